@@ -0,0 +1,95 @@
+"""imports"""
+import sys
+import threading
+from pathlib import Path
+
+
+class Autosaver:
+    """Background thread saving the book after it has changed.
+
+    The book counts its changes in 'changes' (see Decorators.writing).
+    The thread wakes up every 'interval' seconds, or as soon as
+    'threshold' changes are made, and saves only if something changed
+    since the last save. The book is copied under the read lock and the
+    copy is serialized on the thread, so the command loop is blocked only
+    while records are copied. Books that do not keep records in memory
+    are saved in place under the read lock.
+
+    Args:
+        contacts (AddressBook): The address book.
+        database (Path): Path to the contacts file.
+        writer (callable): Function writing the book to the file.
+        interval (float, optional): Seconds between checks, 0 saves only
+            on 'close'. Defaults to 30.
+        threshold (int, optional): Number of changes that triggers a save
+            before the interval is over. Defaults to 100.
+
+    Methods:
+        - start: Start the background thread.
+        - notify: Wake the thread up if enough changes are made.
+        - save: Save the book if it changed since the last save.
+        - close: Stop the thread and save the book.
+    """
+    def __init__(self, contacts, database: Path, writer,
+                 interval: float = 30, threshold: int = 100):
+        self.contacts = contacts
+        self.database = Path(database)
+        self.writer = writer
+        self.interval = interval
+        self.threshold = max(1, threshold)
+        self.saved = contacts.changes
+        self.saving = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, name="autosave",
+                                       daemon=True)
+
+    def start(self) -> None:
+        """Start the background thread, unless the interval is 0."""
+        if self.interval > 0:
+            self.thread.start()
+
+    def run(self) -> None:
+        """Loop of the background thread."""
+        while True:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            if self.stopped:
+                return
+            try:
+                self.save()
+            except OSError as error:
+                # Keep the session going, the next save may succeed.
+                print(f"Autosave failed: {error}", file=sys.stderr)
+
+    def notify(self) -> None:
+        """Wake the thread up if 'threshold' changes are not saved yet."""
+        if self.contacts.changes - self.saved >= self.threshold:
+            self.wake.set()
+
+    def save(self, force: bool = False) -> None:
+        """Save the book if it changed since the last save.
+
+        Args:
+            force (bool, optional): Save even if nothing changed.
+        """
+        with self.saving:
+            with self.contacts.lock.read():
+                changes = self.contacts.changes
+                if changes == self.saved and not force:
+                    return
+                snapshot = self.contacts.snapshot()
+                if snapshot is None:
+                    self.writer(self.database, self.contacts)
+            if snapshot is not None:
+                self.writer(self.database, snapshot)
+            self.saved = changes
+
+    def close(self) -> None:
+        """Stop the thread and save the book, as it was always saved on
+        exit."""
+        self.stopped = True
+        self.wake.set()
+        if self.thread.is_alive():
+            self.thread.join()
+        self.save(force=True)
@@ -0,0 +1,132 @@
+"""imports"""
+import calendar
+import threading
+from datetime import date
+from app.functions import adjust_for_weekend, date_to_string
+
+
+class BirthdayCalendar:
+    """Precomputed table of congratulation dates, one row per day.
+
+    A row holds the date, its congratulation date (already moved from
+    the weekend to Monday) and the names of contacts born on that day.
+    Tables are built per calendar year on first use, so reports for a
+    month, a quarter or a year are read from the table instead of
+    recomputed. When a birthday is added or removed only the row of its
+    day is rebuilt, on the next read. Tables are thrown away when the
+    birthdays of the book change in bulk, e.g. indexes are rebuilt.
+
+    Args:
+        book (AddressBook): The book whose birthdays are tabulated.
+
+    Methods:
+        - changed: Mark the day of a changed birthday.
+        - year: The table of one calendar year.
+        - between: Names and congratulation dates in a range of days.
+    """
+    __slots__ = ('book', 'version', 'years', 'dirty', 'lock')
+
+    def __init__(self, book):
+        self.book = book
+        self.version = None
+        self.years = {}
+        self.dirty = set()
+        # Readers of the book share the tables, the lock keeps one of them
+        # from reading rows another is still updating.
+        self.lock = threading.Lock()
+
+    def changed(self, key: tuple) -> None:
+        """Marks the day of a birthday that was added or removed, called by
+        the book right after it counted the change in 'birthdays_version'.
+        If the tables missed an earlier change, they are rebuilt anyway.
+
+        Args:
+            key (tuple): Month and day of the birthday.
+        """
+        if self.version == self.book.birthdays_version - 1:
+            self.version += 1
+            if self.years:
+                self.dirty.add(key)
+
+    def names(self, day: date) -> tuple:
+        """The ((month, day), names) pairs of a row of the table."""
+        keys = [(day.month, day.day)]
+        # 29 February birthdays are celebrated on 28 February
+        # in non-leap years.
+        if keys[0] == (2, 28) and not calendar.isleap(day.year):
+            keys.append((2, 29))
+        return tuple((key, tuple(self.book.names_born_on(key)))
+                     for key in keys)
+
+    def update(self) -> None:
+        """Rebuilds the rows of the days marked by 'changed'."""
+        for year, table in self.years.items():
+            for month, day in self.dirty:
+                if (month, day) == (2, 29) and not calendar.isleap(year):
+                    day = 28
+                row_day = date(year, month, day)
+                index = row_day.timetuple().tm_yday - 1
+                table[index] = (self.names(row_day), table[index][1])
+        self.dirty = set()
+
+    def year(self, year: int) -> list:
+        """The table of one calendar year, built if it is missing or the
+        birthdays of the book changed in bulk since it was built, with
+        rows of changed days rebuilt.
+
+        Args:
+            year (int): The calendar year.
+
+        Returns:
+            list: Rows of (keys, congratulation date text) where keys is
+                a tuple of ((month, day), names) pairs.
+        """
+        with self.lock:
+            if self.version != self.book.birthdays_version:
+                self.years = {}
+                self.dirty = set()
+                self.version = self.book.birthdays_version
+            if self.dirty:
+                self.update()
+            table = self.years.get(year)
+            if table is None:
+                # Days are counted by ordinals, stepping past 31 December
+                # of year 9999 would overflow.
+                table = [
+                    (self.names(day), date_to_string(adjust_for_weekend(day)))
+                    for day in map(date.fromordinal, range(
+                        date(year, 1, 1).toordinal(),
+                        date(year, 12, 31).toordinal() + 1,
+                    ))
+                ]
+                self.years[year] = table
+            return table
+
+    def between(self, first: date, last: date) -> list:
+        """Names and congratulation dates of birthdays from first to last
+        day inclusive. A day of the year is reported once, even if the
+        range is a whole year long.
+
+        Args:
+            first (date): The first day of the range.
+            last (date): The last day of the range.
+
+        Returns:
+            list: Tuples of name and congratulation date text.
+        """
+        birthdays = []
+        visited = set()
+        for year in range(first.year, last.year + 1):
+            start = first if year == first.year else date(year, 1, 1)
+            end = last if year == last.year else date(year, 12, 31)
+            rows = self.year(year)[start.timetuple().tm_yday - 1:
+                                   end.timetuple().tm_yday]
+            for keys, congratulation_date in rows:
+                for key, names in keys:
+                    if key in visited:
+                        continue
+                    visited.add(key)
+                    birthdays.extend(
+                        (user, congratulation_date) for user in names
+                    )
+        return birthdays
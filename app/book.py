@@ -1,25 +1,80 @@
 """imports"""
+import heapq
 from collections import UserDict
-from datetime import date
-from app.functions import (Decorators,
-                        adjust_for_weekend,
+from datetime import date, timedelta
+from operator import itemgetter
+from app.color import color
+from app.functions import (SEARCH_LIMIT,
+                        Decorators,
                         date_to_string,
                         stringify_birthdays
                     )
 import app.record as rec
+from app.locks import ReadWriteLock
+from app.birthday_calendar import BirthdayCalendar
+from app.search import NameIndex
+from app.ingest import export_contacts, import_contacts
 
 
-class Singleton:
-    """Singleton parent class for AddressBook"""
-    __instance = None
-    def __new__(cls):
-        if not isinstance(cls.__instance, cls):
-            cls.__instance = object.__new__(cls)
-        return cls.__instance
+def format_birthdays(upcoming, first: date, last: date):
+    """Formats birthdays for the 'birthdays' report.
 
+    Lines are streamed to the output, so a report of a year is not joined
+    into one string.
 
-class AddressBook(Singleton, UserDict):
-    """A simple Singleton address book implementation.
+    Args:
+        upcoming (Iterable[tuple]): Tuples of name and congratulation date
+            text, empty if there are no birthdays.
+        first (date): The first day of the report.
+        last (date): The last day of the report.
+
+    Returns:
+        str | Iterable[str]: A line for every birthday, or a message
+            indicating no expected birthdays.
+    """
+    if upcoming:
+        return stringify_birthdays(
+            {"name": user, "congratulation_date": day}
+            for user, day in upcoming
+        )
+    return f"No birthdays expected from {date_to_string(first)} " \
+        f"to {date_to_string(last)}."
+
+def file_error(path: str, error: Exception) -> str:
+    """Message for a file that cannot be imported or exported.
+
+    Args:
+        path (str): Path to the file.
+        error (Exception): OSError or UnicodeError of reading or writing.
+
+    Returns:
+        str: A message for the user.
+    """
+    return f"Invalid file {path}: {getattr(error, 'strerror', None) or error}."
+
+def format_shared_phones(shared: list):
+    """Formats phone numbers shared between contacts.
+
+    Args:
+        shared (list): Tuples of a phone number and the names sharing it.
+
+    Returns:
+        str | Iterable[str]: A line for every shared number or a message.
+    """
+    if not shared:
+        return 'No shared phone numbers.'
+    return (
+        f"{color(phone_number, 'cyan')}: "
+        f"{color(', '.join(names), 'green')}\n"
+        for phone_number, names in shared
+    )
+
+
+class AddressBook(UserDict):
+    """A simple address book implementation.
+
+    Any number of books can exist, e.g. the shards of ShardedBook
+    (see app/shards.py).
 
     This class extends the UserDict class to manage a collection of contacts.
     Uses classes: Name and Phone (children of Field) to store data, and
@@ -32,10 +87,163 @@ class AddressBook(Singleton, UserDict):
         - add_record: Add a new contact record to the address book.
         - find: Find a contact record by name.
         - find_by_phone: Find a contact record by phone number.
+        - shared_phones: Find phone numbers shared between contacts.
         - delete: Delete a contact record from the address book.
+        - rebuild_indexes: Recreate lookup indexes from stored records.
     """
+    def __init__(self):
+        super().__init__()
+        self.phone_index = {}
+        self.birthday_index = {}
+        self.birthdays_count = 0
+        self.birthdays_version = 0
+        self.birthday_calendar = BirthdayCalendar(self)
+        self.name_index = NameIndex()
+        self.lock = ReadWriteLock()
+        self.changes = 0
+
+    def __getstate__(self):
+        # Indexes are rebuilt on load, there is no need to pickle them.
+        return {'data': self.data}
+
+    def __setstate__(self, state):
+        self.__init__()
+        self.data = state['data']
+
+    @Decorators.reading
+    def snapshot(self):
+        """Copies the book, so it can be saved while it keeps changing.
+
+        Returns:
+            AddressBook | None: A detached copy, or None if the records are
+                not kept in memory and the book has to be saved in place.
+        """
+        if not isinstance(self.data, dict):
+            return None
+        book = AddressBook()
+        book.data = {
+            contact_name: record.copy()
+            for contact_name, record in self.data.items()
+        }
+        return book
+
+    def index_phone(self, contact_name: str, phone_number: str) -> None:
+        """Register a phone number of a contact in the phone index.
+
+        Args:
+            contact_name (str): The name of the contact owning the phone.
+            phone_number (str): The phone number to register.
+        """
+        names = self.phone_index.setdefault(phone_number, [])
+        if contact_name not in names:
+            names.append(contact_name)
+
+    def unindex_phone(self, contact_name: str, phone_number: str) -> None:
+        """Remove a phone number of a contact from the phone index.
+
+        Args:
+            contact_name (str): The name of the contact owning the phone.
+            phone_number (str): The phone number to remove.
+        """
+        names = self.phone_index.get(phone_number, [])
+        if contact_name in names:
+            names.remove(contact_name)
+        if not names:
+            self.phone_index.pop(phone_number, None)
+
+    def index_birthday(self, contact_name: str, birth_date: date) -> None:
+        """Register a birthday of a contact in the (month, day) index.
+
+        Args:
+            contact_name (str): The name of the contact.
+            birth_date (date): The birthday date of the contact.
+        """
+        key = (birth_date.month, birth_date.day)
+        # A dict keeps insertion order and makes membership O(1).
+        names = self.birthday_index.setdefault(key, {})
+        if contact_name not in names:
+            names[contact_name] = None
+            self.birthdays_count += 1
+            self.birthdays_version += 1
+            self.birthday_calendar.changed(key)
+
+    def unindex_birthday(self, contact_name: str, birth_date: date) -> None:
+        """Remove a birthday of a contact from the (month, day) index.
+
+        Args:
+            contact_name (str): The name of the contact.
+            birth_date (date): The birthday date of the contact.
+        """
+        key = (birth_date.month, birth_date.day)
+        names = self.birthday_index.get(key, {})
+        if contact_name in names:
+            del names[contact_name]
+            self.birthdays_count -= 1
+            self.birthdays_version += 1
+            self.birthday_calendar.changed(key)
+        if not names:
+            self.birthday_index.pop(key, None)
+
+    def names_born_on(self, key: tuple) -> list:
+        """Returns names of contacts born on the given day of the year.
+
+        Args:
+            key (tuple): Month and day.
+
+        Returns:
+            list: Names of the contacts.
+        """
+        return list(self.birthday_index.get(key, ()))
+
+    @Decorators.writing
+    def rebuild_indexes(self) -> None:
+        """Recreate lookup indexes from stored records.
 
-    @Decorators.validate_two_args
+        Used after the book is loaded from file, because records pickled
+        by older versions know nothing about indexes.
+        """
+        self.phone_index = {}
+        self.birthday_index = {}
+        self.birthdays_count = 0
+        self.birthdays_version += 1
+        self.name_index = NameIndex()
+        if isinstance(self.data, dict):
+            for phone_record in self.data.values():
+                phone_record.book = self
+        else:
+            self.data.book = self
+        names = []
+        for contact_name, phones, birth_date in self.iter_contacts():
+            names.append(contact_name)
+            for phone in phones:
+                self.index_phone(contact_name, phone)
+            if birth_date:
+                self.index_birthday(contact_name, birth_date)
+        self.name_index.extend(names)
+
+    def iter_contacts(self):
+        """Yield raw data of every contact.
+
+        Stores able to stream their contents (see app/store.py) are read
+        without building Record objects.
+
+        Yields:
+            tuple: Name, tuple of phone numbers and birthday date or None.
+        """
+        raw_items = getattr(self.data, 'raw_items', None)
+        if raw_items is not None:
+            yield from raw_items()
+            return
+        with self.lock.read():
+            items = list(self.data.items())
+        for contact_name, phone_record in items:
+            yield (
+                contact_name,
+                phone_record.phones,
+                phone_record.show_birthday() if phone_record.birthday else None
+            )
+
+    @Decorators.writing
     @Decorators.make_record
     def add_record(self, user_record: rec.Record) -> str:
         """Add a new contact record to the address book.
@@ -49,9 +257,16 @@ class AddressBook(Singleton, UserDict):
         if user_record.name.value in self.data:
             return 'contact exists'
         self.data[user_record.name.value] = user_record
+        self.name_index.add(user_record.name.value)
+        user_record.book = self
+        for phone in user_record.phones:
+            self.index_phone(user_record.name.value, phone)
+        if user_record.birthday:
+            self.index_birthday(user_record.name.value,
+                                user_record.birthday.value)
         return "Contact added."
 
-    @Decorators.validate_one_arg
+    @Decorators.reading
     def find(self, contact_name: str) -> str:
         """Finding a contact record by name.
 
@@ -61,8 +276,11 @@ class AddressBook(Singleton, UserDict):
         Returns:
             str: The contact record corresponding to the provided name.
         """
+        if contact_name not in self.data:
+            return 'phone not in contacts'
         return self.data[contact_name]
 
+    @Decorators.reading
     def find_by_phone(self, phone_number: str) -> str:
         """Find a contact record by phone number.
 
@@ -72,26 +290,76 @@ class AddressBook(Singleton, UserDict):
         Returns:
             str: The name of the contact associated with given phone number.
         """
-        for contact_name, phone_record in self.data.items():
-            if phone_record.find_phone(phone_number):
-                return contact_name
+        try:
+            phone_number = rec.normalize_phone(phone_number)
+        except ValueError:
+            return "No contact found with this phone number"
+        names = self.phone_index.get(phone_number)
+        if names:
+            return names[0]
         return "No contact found with this phone number"
 
-    @Decorators.validate_two_args
+    @Decorators.reading
+    def shared_phones(self) -> list:
+        """Finds phone numbers that belong to more than one contact.
+
+        Returns:
+            list: Tuples of a phone number and the names sharing it,
+                sorted by number.
+        """
+        return sorted(
+            (phone_number, list(names))
+            for phone_number, names in self.phone_index.items()
+            if len(names) > 1
+        )
+
+    @Decorators.reading
+    def phone_numbers(self) -> set:
+        """Phone numbers of all contacts, e.g. to find numbers shared
+        between shards of ShardedBook."""
+        return set(self.phone_index)
+
+    @Decorators.reading
+    def phone_owners(self, numbers) -> list:
+        """Names of contacts having the given phone numbers.
+
+        Args:
+            numbers (Iterable[str]): Normalized phone numbers.
+
+        Returns:
+            list: Tuples of a phone number and a list of names, for the
+                numbers found in the book.
+        """
+        return [(phone_number, list(self.phone_index[phone_number]))
+                for phone_number in numbers
+                if phone_number in self.phone_index]
+
+    def duplicates(self):
+        """Reports phone numbers shared between contacts.
+
+        Returns:
+            str | Iterable[str]: A line for every shared number or
+                a message.
+        """
+        return format_shared_phones(self.shared_phones())
+
+    @Decorators.writing
     def add_phone(self, contact_name, new_phone):
         """Adds a new phone number to the specified contact.
 
         Args:
             contact_name (str): The name of the contact to whom the phone
                 number will be added.
-            new_phone (str): The new phone number to add to the contact.
+            new_phone (str): The new normalized phone number.
 
         Returns:
-            bool: True if the phone was successfully added, False otherwise.
+            str: A message indicating the status of the operation.
         """
+        if contact_name not in self.data:
+            return 'phone not in contacts'
         return self.data[contact_name].add_phone(new_phone)
 
-    @Decorators.validate_three_args
+    @Decorators.writing
     def change_phone(self, contact_name, old_phone, new_phone):
         """Changes an existing phone number for the specified contact.
 
@@ -104,23 +372,67 @@ class AddressBook(Singleton, UserDict):
         Returns:
             bool: True if the phone was successfully changed, False otherwise.
         """
+        if contact_name not in self.data:
+            return 'phone not in contacts'
         return self.data[contact_name].edit_phone(old_phone, new_phone)
 
-    def show_all(self) -> str:
+    def show_all(self, page=None, size=None):
         """Display all the contacts.
 
+        Without a page contacts are streamed in storage order. A page is
+        taken from contacts sorted by name, keeping in memory only the
+        contacts up to the end of the requested page. Lines of records kept
+        in memory are cached by 'Record.render'.
+
     Args:
-        contacts (dict): A dictionary containing contacts base.
+        page (int, optional): Number of the page, starting from 1.
+        size (int, optional): Number of contacts on a page.
 
-    Returns:
-        str: The formatted list of contacts.
+    Yields:
+        str: The formatted contacts, one line at a time.
     """
-        output_of_contacts: str = ''
-        for _, phone_record in self.data.items():
-            output_of_contacts += f"{phone_record}\n"
-        return output_of_contacts
+        if page is not None:
+            lines = self.first_contacts(page * size)[(page - 1) * size:]
+            for _, line in lines:
+                yield line
+            return
+        if isinstance(self.data, dict):
+            # Records in memory keep their rendered lines between listings.
+            with self.lock.read():
+                records = list(self.data.values())
+            for record in records:
+                yield record.render()
+            return
+        for contact_name, phones, _ in self.iter_contacts():
+            yield f"{rec.format_contact(contact_name, phones)}\n"
+
+    def first_contacts(self, count: int) -> list:
+        """Lines of the first contacts sorted by name, for pages of
+        'show_all'. Only 'count' contacts are kept in memory.
 
-    @Decorators.validate_birthday
+        Args:
+            count (int): Number of contacts.
+
+        Returns:
+            list: Tuples of name and line, sorted by name.
+        """
+        if isinstance(self.data, dict):
+            with self.lock.read():
+                records = list(self.data.items())
+            return [
+                (contact_name, record.render())
+                for contact_name, record in heapq.nsmallest(
+                    count, records, key=itemgetter(0)
+                )
+            ]
+        return [
+            (contact_name, f"{rec.format_contact(contact_name, phones)}\n")
+            for contact_name, phones, _ in heapq.nsmallest(
+                count, self.iter_contacts(), key=itemgetter(0)
+            )
+        ]
+
+    @Decorators.writing
     def birthday_date(self, contact_name, birth_date):
         """Adds a birthday date to the specified contact.
 
@@ -133,9 +445,11 @@ class AddressBook(Singleton, UserDict):
         Returns:
             bool: True if the birthday was successfully added, False otherwise.
         """
+        if contact_name not in self.data:
+            return 'phone not in contacts'
         return self.data[contact_name].add_birthday(birth_date)
 
-    @Decorators.validate_one_arg
+    @Decorators.reading
     def show_birth_date(self, contact_name):
         """Retrieves and returns the birthday date of the specified contact
         as a string.
@@ -147,8 +461,37 @@ class AddressBook(Singleton, UserDict):
         Returns:
             str: The birthday date of the contact in string format.
         """
+        if contact_name not in self.data:
+            return 'phone not in contacts'
         return date_to_string(self.data[contact_name].show_birthday())
 
+    @Decorators.reading
+    def upcoming_birthdays(self, first: date, last: date) -> list:
+        """Birthdays from the first to the last day inclusive.
+
+        Dates are read from the precomputed calendar table.
+
+        Args:
+            first (date): The first day of the report.
+            last (date): The last day of the report.
+
+        Returns:
+            list: Tuples of name and congratulation date text, ordered by
+                birthday.
+        """
+        return self.birthday_calendar.between(first, last)
+
+    def report_birthdays(self, first: date, last: date):
+        """Lists birthdays from the first to the last day inclusive, see
+        'upcoming_birthdays'.
+
+        Returns:
+            str | Iterable[str]: A line for every birthday, or a message
+                indicating no expected birthdays.
+        """
+        return format_birthdays(self.upcoming_birthdays(first, last),
+                                first, last)
+
     def get_upcoming_birthdays(self, days=7):
         """Retrieves and returns a list of upcoming birthdays within
         the specified number of days.
@@ -158,35 +501,132 @@ class AddressBook(Singleton, UserDict):
                 upcoming birthdays. Defaults to 7.
 
         Returns:
-            str: A formatted string listing the upcoming birthdays within
+            str | Iterable[str]: A line for every upcoming birthday within
                 the specified number of days, or a message indicating
                 no expected birthdays.
 
         """
-        upcoming_birthdays = []
         today = date.today()
+        return self.report_birthdays(
+            today, today + timedelta(days=min(days, 365))
+        )
+
+    @Decorators.writing
+    def merge(self, contact_name: str, phones, birthday=None) -> None:
+        """Merges already validated data into a contact, creating it if
+        it does not exist yet.
+
+        Args:
+            contact_name (str): The name of the contact.
+            phones (iterable): Valid phone numbers to add.
+            birthday (Birthday, optional): Birthday to set if the contact
+                has none.
+        """
+        self.merge_contact(contact_name, phones, birthday)
+
+    @Decorators.writing
+    def merge_batch(self, contacts) -> None:
+        """Merges a batch of already validated contacts under one write
+        lock, counted as one change, e.g. a batch of 'import'.
+
+        Args:
+            contacts (Iterable[tuple]): Name, phones and Birthday or None
+                of every contact, see 'merge'.
+        """
+        for contact_name, phones, birthday in contacts:
+            self.merge_contact(contact_name, phones, birthday)
+
+    def merge_contact(self, contact_name: str, phones, birthday) -> None:
+        """Merges one contact for 'merge' and 'merge_batch', the caller
+        holds the write lock."""
+        user_record = self.data.get(contact_name)
+        if user_record is None:
+            # A new record is filled before it is linked to the book, so
+            # its phones are set without taking the lock again.
+            user_record = rec.Record(contact_name)
+            self.data[contact_name] = user_record
+            self.name_index.add(contact_name)
+            user_record.phones = tuple(dict.fromkeys(phones))
+            user_record.book = self
+            for phone in user_record.phones:
+                self.index_phone(contact_name, phone)
+        else:
+            user_record.add_phones(phones)
+        if birthday is not None and not user_record.birthday:
+            user_record.birthday = birthday
+            self.index_birthday(contact_name, birthday.value)
+
+    @Decorators.reading
+    def search_names(self, query: str, limit: int) -> list:
+        """Finds names starting with the query, then names similar to it.
+
+        Args:
+            query (str): The beginning of a name or a name with typos.
+            limit (int): Maximal number of names.
+
+        Returns:
+            list: Names of the found contacts.
+        """
+        names = self.name_index.prefix(query, limit)
+        if len(names) < limit:
+            max_distance = 1 if len(query) <= 4 else 2
+            for contact_name in self.name_index.fuzzy(query, max_distance,
+                                                      limit):
+                if contact_name not in names and len(names) < limit:
+                    names.append(contact_name)
+        return names
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT):
+        """Searches contacts by the beginning of a name or by a name with
+        typos.
+
+        Args:
+            query (str): The beginning of a name or a name with typos.
+            limit (int, optional): Maximal number of results.
+
+        Returns:
+            str | Iterable[str]: The found contacts or a message.
+        """
+        names = self.search_names(query, limit)
+        if not names:
+            return 'No contacts found.'
+        return (
+            f"{rec.format_contact(name, self.data[name].phones)}\n"
+            for name in names
+        )
+
+    def import_file(self, path: str, rejects: str = None) -> str:
+        """Imports contacts from a CSV or vCard file.
+
+        Args:
+            path (str): Path to the file.
+            rejects (str, optional): Path of the file for rejected rows.
+
+        Returns:
+            str: A message indicating the status of the operation.
+        """
+        try:
+            return import_contacts(self, path, rejects)
+        except FileNotFoundError:
+            return 'File not found.'
+        except (OSError, UnicodeError) as error:
+            return file_error(path, error)
+
+    def export_file(self, path: str) -> str:
+        """Exports contacts to a CSV or vCard file.
+
+        Args:
+            path (str): Path to the file.
+
+        Returns:
+            str: A message indicating the status of the operation.
+        """
+        try:
+            return export_contacts(self, path)
+        except (OSError, UnicodeError) as error:
+            return file_error(path, error)
 
-        for user, _ in self.data.items():
-            birth_date = self.data[user].show_birthday()
-            try:
-                birthday_this_year = birth_date.replace(year=today.year)
-                if birthday_this_year < today:
-                    birthday_this_year = birth_date.replace(year=today.year+1)
-            except TypeError:
-                continue
-
-            if 0 <= (birthday_this_year - today).days <= days:
-                birthday_this_year = adjust_for_weekend(birthday_this_year)
-                congratulation_date_str = date_to_string(birthday_this_year)
-                upcoming_birthdays.append({
-                    "name": user,
-                    "congratulation_date": congratulation_date_str
-                })
-        if upcoming_birthdays:
-            return stringify_birthdays(upcoming_birthdays)
-        return 'No birthdays exspected next week.'
-
-    @Decorators.validate_one_arg
+    @Decorators.writing
     def delete(self, contact_name: str) -> str:
         """Delete a contact record from the address book.
 
@@ -197,6 +637,12 @@ class AddressBook(Singleton, UserDict):
             str: A message indicating the status of the operation.
         """
         if contact_name not in self.data:
-            return "Contact not found"
-        del self.data[contact_name]
+            return 'phone not in contacts'
+        phone_record = self.data.pop(contact_name)
+        self.name_index.remove(contact_name)
+        for phone in phone_record.phones:
+            self.unindex_phone(contact_name, phone)
+        if phone_record.birthday:
+            self.unindex_birthday(contact_name, phone_record.birthday.value)
+        phone_record.book = None
         return "Contact deleted"
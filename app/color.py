@@ -1,68 +1,158 @@
 """imports"""
-try:
-    import colorama
-    from colorama import Fore
-    colorama.init(autoreset=True)
-    COLORAMA = True
-except ImportError:
+import os
+import sys
+
+
+# Environment variable switching colors off, see https://no-color.org.
+NO_COLOR_ENV = "NO_COLOR"
+# Modes of '--color': 'auto' colors only a terminal without NO_COLOR set.
+COLOR_MODES = ("auto", "always", "never")
+
+# Color prefixes by name, all empty for plain text.
+PLAIN_PALETTE = {'yellow': '', 'green': '', 'cyan': '', 'red': '', 'blue': ''}
+
+
+def build_messages(palette: dict) -> dict:
+    """Builds the table of bot messages for a palette.
+
+    Args:
+        palette (dict): Color prefixes by name.
+
+    Returns:
+        dict: Message key to the text shown to the user.
+    """
+    yellow, red, blue = palette['yellow'], palette['red'], palette['blue']
+    return {
+        'greeting': f"\n{yellow}Welcome to the assistant bot!\n"
+                    "(enter 'help' for list of commands)\n",
+        'placeholder': f"Enter a command: {blue}",
+        'bye': f"{yellow}Good bye!\n",
+        'hello': f"{yellow}How can I help you?\n",
+        'invalid command': f"{red}Invalid command.\n",
+        'phone not in contacts': f"{red}Invalid Name.\n{yellow}This "
+                                 "contact doesn't exist.",
+        'contact exists': f"{red}Invalid Name.\n{yellow}This contact "
+                          "already exists.",
+        'no name for search': f"{red}Invalid data.\n{yellow}You must give "
+                              "me Name.",
+        'invalid phone': f"{red}Invalid Phone-number.\n{yellow}Must be 10 "
+                         "numbers.",
+        'invalid args': f"{red}Invalid data.\n{yellow}You must give me Name "
+                        "and Phone-number.",
+    }
+
+
+PLAIN_MESSAGES = build_messages(PLAIN_PALETTE)
+# Tables in use. They stay None until the first output, when 'load_colors'
+# picks them, so colorama is not imported by runs that never color.
+MODE = "auto"
+COLORAMA = False
+PALETTE = None
+MESSAGES = None
+
+
+def wants_colors(mode: str) -> bool:
+    """Tells whether output should be colored in a mode.
+
+    Args:
+        mode (str): One of COLOR_MODES.
+
+    Returns:
+        bool: True for 'always', and for 'auto' when stdout is a terminal
+        and NO_COLOR is not set.
+    """
+    if mode == "auto":
+        return not os.environ.get(NO_COLOR_ENV) and sys.stdout.isatty()
+    return mode == "always"
+
+def fore_palette() -> dict:
+    """Color prefixes of colorama, plain ones if it is not installed."""
+    try:
+        from colorama import Fore
+    except ImportError:
+        return PLAIN_PALETTE
+    return {
+        'yellow': Fore.YELLOW, 'green': Fore.GREEN, 'cyan': Fore.CYAN,
+        'red': Fore.RED, 'blue': Fore.BLUE,
+    }
+
+def load_colors() -> dict:
+    """Picks the tables in use, on the first colored or plain output.
+
+    colorama is imported and wraps stdout only if colors are wanted.
+
+    Returns:
+        dict: The palette in use.
+    """
+    global COLORAMA, PALETTE, MESSAGES
+    COLORAMA, PALETTE, MESSAGES = False, PLAIN_PALETTE, PLAIN_MESSAGES
+    if wants_colors(MODE):
+        palette = fore_palette()
+        if palette is not PLAIN_PALETTE:
+            import colorama
+            # colorama strips colors of a pipe unless told otherwise.
+            colorama.init(autoreset=True,
+                          strip=False if MODE == "always" else None)
+            COLORAMA, PALETTE = True, palette
+            MESSAGES = build_messages(palette)
+    return PALETTE
+
+def set_color_mode(mode: str) -> None:
+    """Sets when output is colored, tables are picked again on next use.
+
+    Args:
+        mode (str): One of COLOR_MODES.
+    """
+    global MODE, COLORAMA, PALETTE, MESSAGES
+    if COLORAMA:
+        import colorama
+        colorama.deinit()
+    MODE = mode
     COLORAMA = False
+    PALETTE = MESSAGES = None
 
+def palette() -> dict:
+    """Color prefixes in use by name, picked on the first call."""
+    return PALETTE or load_colors()
 
 def check_txt(arg: str) -> str:
-    """Function for easy access to class ColorTxt.
+    """Function for easy access to the message table.
 
     Args:
-        arg (str): Takes str to match case in class.
+        arg (str): Key of the message.
 
     Returns:
-        str: Colored or not text for output.
+        str: Colored or not text for output, None for an unknown key.
     """
-    output = ColorTxt()
-    return output(arg)
+    if MESSAGES is None:
+        load_colors()
+    return MESSAGES.get(arg)
 
 def color(args: str, chosen_color: str) -> str:
     """Function to color text output in color if 'colorama' imported.
     """
+    if PALETTE is None:
+        load_colors()
     if not COLORAMA:
         return args
-    match chosen_color:
-        case 'yellow':
-            return f"{Fore.YELLOW}{args}"
-        case 'green':
-            return f"{Fore.GREEN}{args}"
-        case 'cyan':
-            return f"{Fore.CYAN}{args}"
-        case 'red':
-            return f"{Fore.RED}{args}"
-
-def command_help():
-    """Help for commands of bot"""
-    return "'add [name] [phone]'\t\t\tto add new contact " \
-            "(phone must be 10 digits).\n" \
-            "'add-birthday [name] [birth date]'\tto add date" \
-            "of birth (date must be in format 'DD.MM.YYYY').\n" \
-            "'all'\t\t\t\t\tto review all contacts.\n" \
-            "'birthdays'\t\t\t\tto show upcoming birthdays in 7 days.\n" \
-            "'change [name] [old phone] [new phone]'\t" \
-            "to change contact's phone number.\n" \
-            "'del [name]'\t\t\t\tto delete contact from list.\n" \
-            "'phone [name]'\t\t\t\tto review contact's phone number.\n" \
-            "'show-birthday [name]'\t\t\tto show birth date of contact.\n" \
-            "'close' or 'exit'\t\t\tto exit assistant.\n"
+    return f"{PALETTE[chosen_color]}{args}"
+
+def disable_colors() -> None:
+    """Switch all output to plain text, e.g. for batch runs."""
+    set_color_mode("never")
 
 
 class ColorTxt:
-    """Colorized output in case of user input, output and mistakes."""
+    """Colorized output in case of user input, output and mistakes.
+
+    Messages are read from the tables of this module.
+    """
     def __call__(self, arg):
-        return self.colored_txt(arg) if COLORAMA else self.formatted_txt(arg)
+        return check_txt(arg)
 
     def colored_txt(self, request: str) -> str:
         """Colorized output in case of user input, output and mistakes.
 
-    This function takes a single argument, `request` which is a string
-    representing a message. It returns a formatted string with colorful
-    terminal output based on the given request.
-
     Args:
         request (str): The message to be displayed.
 
@@ -70,72 +160,15 @@ class ColorTxt:
         str: A formatted string containing the error message in colorful
         terminal output.
     """
-        match request:
-            case 'greeting':
-                return f"\n{Fore.YELLOW}Welcome to the assistant bot!\n" \
-                "(enter 'help' for list of commands)\n"
-            case 'placeholder':
-                return f"Enter a command: {Fore.BLUE}"
-            case 'bye':
-                return f"{Fore.YELLOW}Good bye!\n"
-            case 'hello':
-                return f"{Fore.YELLOW}How can I help you?\n"
-            case 'invalid command':
-                return f"{Fore.RED}Invalid command.\n"
-            case 'phone not in contacts':
-                return f"{Fore.RED}Invalid Name.\n{Fore.YELLOW}This contact " \
-                    "doesn't exist."
-            case 'contact exists':
-                return f"{Fore.RED}Invalid Name.\n{Fore.YELLOW}This contact " \
-                    "already exists."
-            case 'no name for search':
-                return f"{Fore.RED}Invalid data.\n{Fore.YELLOW}You must " \
-                    "give me Name."
-            case 'invalid phone':
-                return f"{Fore.RED}Invalid Phone-number.\n{Fore.YELLOW}Must " \
-                    "be 10 numbers."
-            case 'invalid args':
-                return f"{Fore.RED}Invalid data.\n{Fore.YELLOW}You must " \
-                    "give me Name and Phone-number."
+        return build_messages(fore_palette()).get(request)
 
     def formatted_txt(self, request: str) -> str:
         """Non-colorized output in case of user input, output and mistakes.
 
-    This function takes a single argument, `request` which is a string
-    representing a message. It returns a formatted string based on the given
-    request.
-
     Args:
         request (str): The message to be displayed.
 
     Returns:
-        str: A formatted string containing the error message in colorful
-        terminal output.
+        str: A formatted string containing the message.
     """
-        match request:
-            case 'greeting':
-                return "\nWelcome to the assistant bot!\n" \
-                "(enter 'help' for list of commands)\n"
-            case 'placeholder':
-                return "Enter a command: "
-            case 'bye':
-                return "Good bye!\n"
-            case 'hello':
-                return "How can I help you?\n"
-            case 'invalid command':
-                return "Invalid command.\n"
-            case 'phone not in contacts':
-                return "Invalid Name.\nThis contact " \
-                    "doesn't exist."
-            case 'contact exists':
-                return "Invalid Name.\nThis contact " \
-                    "already exists."
-            case 'no name for search':
-                return "Invalid data.\nYou must " \
-                    "give me Name."
-            case 'invalid phone':
-                return "Invalid Phone-number.\nMust " \
-                    "be 10 numbers."
-            case 'invalid args':
-                return "Invalid data.\nYou must " \
-                    "give me Name and Phone-number."
+        return PLAIN_MESSAGES.get(request)
@@ -0,0 +1,306 @@
+"""imports"""
+from collections.abc import Iterator
+from time import perf_counter
+from app.color import check_txt, color
+from app.functions import (birthday_range, name_and_date, name_and_phone,
+                           name_and_phones, page_args, search_args)
+from app.stats import STATS
+
+
+COMMANDS = {}
+
+
+class Command:
+    """A command of the bot.
+
+    Every command declares how many arguments it takes, how they are
+    validated, how its result is formatted and its line in 'help'. Commands
+    are looked up in the COMMANDS registry, so new commands are added with
+    'register' without changing the bot loop.
+
+    Args:
+        name (str): The command as typed, without non-letter characters.
+        handler (callable): Function taking the address book and the list
+            of validated arguments and returning the result.
+        arity (tuple, optional): Allowed numbers of arguments, any if None.
+        arity_error (str, optional): Result for a wrong number of arguments.
+        validator (callable, optional): Function taking the arguments and
+            returning them parsed for the handler or an error message.
+        formatter (callable, optional): Function formatting the result.
+        usage (str, optional): Usage shown in 'help'.
+        description (str, optional): Description shown in 'help'.
+        mutates (bool, optional): Whether the command changes the book.
+        stop (bool, optional): Whether the command ends the session.
+        remote (bool, optional): Whether network clients may run the
+            command, False for commands reading or writing files.
+    """
+    __slots__ = ('name', 'handler', 'arity', 'arity_error', 'validator',
+                 'formatter', 'usage', 'description', 'mutates', 'stop',
+                 'remote')
+
+    def __init__(self, name, handler, arity=None, arity_error='invalid args',
+                 validator=None, formatter=None, usage='', description='',
+                 mutates=False, stop=False, remote=True):
+        self.name = name
+        self.handler = handler
+        self.arity = arity
+        self.arity_error = arity_error
+        self.validator = validator
+        self.formatter = formatter
+        self.usage = usage
+        self.description = description
+        self.mutates = mutates
+        self.stop = stop
+        self.remote = remote
+
+    def __call__(self, contacts, args: list):
+        result = self.execute(contacts, args)
+        if self.formatter is not None:
+            return self.formatter(result)
+        return result
+
+    def check(self, args: list):
+        """Checks the number of arguments and validates them.
+
+        Returns:
+            list | str: The arguments for the handler or an error message.
+        """
+        if self.arity is not None and len(args) not in self.arity:
+            return self.arity_error
+        if self.validator is not None:
+            return self.validator(args)
+        return args
+
+    def execute(self, contacts, args: list):
+        """Runs the handler on validated arguments without formatting the
+        result, e.g. to replay the journal."""
+        args = self.check(args)
+        if isinstance(args, str):
+            return args
+        return self.handler(contacts, args)
+
+    def collect(self, contacts, args: list):
+        """Runs the handler and collects streamed output into a list."""
+        result = self.handler(contacts, args)
+        if isinstance(result, Iterator):
+            return list(result)
+        return result
+
+    def timed(self, contacts, args: list):
+        """Runs the command like '__call__' and records the duration of
+        its validate, execute and format stages and of the whole command.
+
+        Streamed output is collected into a list inside the execute stage,
+        so the time spent in generators is not lost.
+        """
+        start = perf_counter()
+        args = self.check(args)
+        validated = perf_counter()
+        if isinstance(args, str):
+            result = args
+        else:
+            result = STATS.profiled(self.name, self.collect, contacts, args)
+        executed = perf_counter()
+        if self.formatter is not None:
+            result = self.formatter(result)
+        formatted = perf_counter()
+        STATS.add(STATS.stages, "validate", validated - start)
+        STATS.add(STATS.stages, "execute", executed - validated)
+        STATS.add(STATS.stages, "format", formatted - executed)
+        STATS.add(STATS.commands, self.name, formatted - start)
+        return result
+
+
+def register(name: str, *aliases, **options):
+    """Decorator registering a handler as a command of the bot.
+
+    Args:
+        name (str): The command.
+        aliases (str): Other names of the same command.
+        options: Keyword arguments of Command.
+
+    Returns:
+        callable: The decorator returning the handler unchanged.
+    """
+    def decorator(handler):
+        command = Command(name, handler, **options)
+        for key in (name, *aliases):
+            COMMANDS[key] = command
+        return handler
+
+    return decorator
+
+
+def dispatch(contacts, command: str, args: list):
+    """Runs a command on the address book.
+
+    Args:
+        contacts (AddressBook): The address book.
+        command (str): The parsed command.
+        args (list): Arguments of the command.
+
+    Returns:
+        str | Iterable[str]: Output of the command.
+    """
+    handler = COMMANDS.get(command)
+    if handler is None:
+        return check_txt("invalid command")
+    if STATS.enabled:
+        return handler.timed(contacts, args)
+    return handler(contacts, args)
+
+
+def command_help() -> str:
+    """Help for commands of bot, built from the registry."""
+    lines = []
+    for command in dict.fromkeys(COMMANDS.values()):
+        if command.usage:
+            lines.append(f"{command.usage:<40}{command.description}\n")
+    return ''.join(lines)
+
+
+def yellow(result) -> str:
+    """Formats a result of a command in yellow."""
+    return color(result, 'yellow')
+
+
+def green(result) -> str:
+    """Formats a result of a command in green."""
+    return color(result, 'green')
+
+
+@register("hello")
+def hello(_contacts, _args):
+    """Greets the user."""
+    return check_txt('hello')
+
+
+@register("help")
+def show_help(_contacts, _args):
+    """Shows help for commands."""
+    return command_help()
+
+
+@register("add", validator=name_and_phone, formatter=yellow, mutates=True,
+          usage="'add [name] [phone]'",
+          description="to add new contact (phone must be 10 digits, "
+          "'+38 (050) 123-45-67' is accepted too).")
+def add(contacts, args):
+    """Adds a new contact."""
+    return contacts.add_record(*args)
+
+
+@register("addbirthday", arity=(2,), validator=name_and_date,
+          formatter=yellow, mutates=True,
+          usage="'add-birthday [name] [birth date]'",
+          description="to add date of birth "
+          "(date must be in format 'DD.MM.YYYY').")
+def add_birthday(contacts, args):
+    """Adds a birthday to a contact."""
+    return contacts.birthday_date(*args)
+
+
+@register("all", arity=(0, 1, 2), validator=page_args,
+          usage="'all [page] [size]'",
+          description="to review all contacts "
+          "(by pages sorted by name if page is given).")
+def show_all(contacts, args):
+    """Streams all contacts."""
+    return contacts.show_all(*args)
+
+
+@register("birthdays", arity=(0, 1, 2), validator=birthday_range,
+          usage="'birthdays [days] | [from] [to]'",
+          description="to show birthdays in 7 or given days, "
+          "or between two dates.")
+def birthdays(contacts, args):
+    """Shows upcoming birthdays."""
+    return contacts.report_birthdays(*args)
+
+
+@register("change", validator=name_and_phones,
+          formatter=yellow, mutates=True,
+          usage="'change [name] [old phone] [new phone]'",
+          description="to change contact's phone number "
+          "(phones may be typed with spaces too).")
+def change(contacts, args):
+    """Changes a phone number of a contact."""
+    return contacts.change_phone(*args)
+
+
+@register("del", arity=(1,), arity_error='no name for search',
+          formatter=yellow, mutates=True,
+          usage="'del [name]'",
+          description="to delete contact from list.")
+def delete(contacts, args):
+    """Deletes a contact."""
+    return contacts.delete(*args)
+
+
+@register("search", arity=(1, 2), validator=search_args,
+          usage="'search [name] [limit]'",
+          description="to find contacts by beginning of name or by name "
+          "with typos.")
+def search(contacts, args):
+    """Searches contacts by name."""
+    return contacts.search(*args)
+
+
+@register("duplicates", arity=(0,),
+          usage="'duplicates'",
+          description="to list phone numbers shared between contacts.")
+def duplicates(contacts, _args):
+    """Lists phone numbers shared between contacts."""
+    return contacts.duplicates()
+
+
+@register("import", arity=(1, 2), formatter=yellow, mutates=True,
+          remote=False,
+          usage="'import [file] [rejects file]'",
+          description="to import contacts from CSV or vCard (.vcf) file.")
+def import_file(contacts, args):
+    """Imports contacts from a file."""
+    return contacts.import_file(*args)
+
+
+@register("export", arity=(1,), formatter=yellow, remote=False,
+          usage="'export [file]'",
+          description="to export contacts to CSV or vCard (.vcf) file.")
+def export_file(contacts, args):
+    """Exports contacts to a file."""
+    return contacts.export_file(*args)
+
+
+@register("phone", arity=(1,), arity_error='no name for search',
+          formatter=str,
+          usage="'phone [name]'",
+          description="to review contact's phone number.")
+def phone(contacts, args):
+    """Shows a contact."""
+    return contacts.find(*args)
+
+
+@register("showbirthday", arity=(1,), arity_error='no name for search',
+          formatter=green,
+          usage="'show-birthday [name]'",
+          description="to show birth date of contact.")
+def show_birthday(contacts, args):
+    """Shows the birthday of a contact."""
+    return contacts.show_birth_date(*args)
+
+
+@register("stats", arity=(0,),
+          usage="'stats'",
+          description="to show command counts and latencies "
+          "(start with '--stats FILE').")
+def stats(_contacts, _args):
+    """Shows command statistics."""
+    return STATS.report()
+
+
+@register("close", "exit", stop=True,
+          usage="'close' or 'exit'",
+          description="to exit assistant.")
+def close(_contacts, _args):
+    """Ends the session."""
+    return check_txt('bye')
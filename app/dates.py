@@ -0,0 +1,44 @@
+"""imports"""
+from datetime import date, datetime
+from functools import lru_cache
+
+
+DATE_FORMAT = '%d.%m.%Y'
+CACHE_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_date(text: str) -> date:
+    """Parses a date in the format 'DD.MM.YYYY'.
+
+    The common zero-padded form is split by position, anything else falls
+    back to strptime, so accepted input is the same as with strptime.
+    Results are kept in a bounded LRU cache.
+
+    Args:
+        text (str): The date.
+
+    Returns:
+        date: The parsed date.
+
+    Raises:
+        ValueError: If the date is invalid or in a different format.
+    """
+    if len(text) == 10 and text[2] == '.' and text[5] == '.' \
+            and text[:2].isdigit() and text[3:5].isdigit() \
+            and text[6:].isdigit() and text.isascii():
+        return date(int(text[6:]), int(text[3:5]), int(text[:2]))
+    return datetime.strptime(text, DATE_FORMAT).date()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def format_date(value: date) -> str:
+    """Formats a date as 'DD.MM.YYYY', caching the results.
+
+    Args:
+        value (date): The date.
+
+    Returns:
+        str: The formatted date.
+    """
+    return f"{value.day:02d}.{value.month:02d}.{value.year:04d}"
@@ -1,15 +1,177 @@
 """imports"""
+import lzma
+import os
 import pickle
+import struct
+import zlib
+from pathlib import Path
 from app.book import AddressBook
 
 
+# Snapshot header: magic, compression, CRC-32 and length of the payload.
+MAGIC = b'ABKP'
+HEADER = struct.Struct('<4sBIQ')
+COMPRESSIONS = {"none": 0, "zlib": 1, "lzma": 2}
+CHUNK_SIZE = 1 << 20
+COMPRESSION = "none"
+BACKUPS = 3
+
+
+class SnapshotError(Exception):
+    """The snapshot exists but cannot be trusted."""
+
+
+def set_snapshot_options(compression: str, backups: int) -> None:
+    """Sets how snapshots are written by 'write_file'.
+
+    Args:
+        compression (str): One of COMPRESSIONS.
+        backups (int): Number of previous snapshots to keep.
+    """
+    global COMPRESSION, BACKUPS
+    COMPRESSION = compression
+    BACKUPS = max(0, backups)
+
+
+class SnapshotWriter:
+    """File-like object compressing and checksumming a pickle stream.
+
+    Args:
+        file (BinaryIO): Buffered file to write the payload to.
+        compression (str): One of COMPRESSIONS.
+    """
+    def __init__(self, file, compression: str):
+        self.file = file
+        self.crc = 0
+        self.length = 0
+        match compression:
+            case "zlib":
+                self.compressor = zlib.compressobj()
+            case "lzma":
+                self.compressor = lzma.LZMACompressor()
+            case _:
+                self.compressor = None
+
+    def write(self, data) -> int:
+        """Compresses data and writes it to the file."""
+        size = len(data)
+        if self.compressor is not None:
+            data = self.compressor.compress(data)
+        self.put(data)
+        return size
+
+    def put(self, data) -> None:
+        """Writes payload bytes and updates the checksum."""
+        self.crc = zlib.crc32(data, self.crc)
+        self.length += len(data)
+        self.file.write(data)
+
+    def finish(self) -> None:
+        """Writes the rest of the compressed stream."""
+        if self.compressor is not None:
+            self.put(self.compressor.flush())
+
+
+def backup_paths(database: Path) -> list:
+    """Paths of rotated backups, newest first: contacts.pkl.1, .2, ..."""
+    return [database.with_name(f"{database.name}.{number}")
+            for number in range(1, BACKUPS + 1)]
+
+
+def rotate_backups(database: Path) -> None:
+    """Shifts backups by one and keeps the current snapshot as '.1'.
+
+    The current snapshot is hard linked (copied if links are not
+    supported), so the database path never disappears.
+    """
+    backups = backup_paths(database)
+    if not backups or not database.exists():
+        return
+    for older, newer in zip(reversed(backups), reversed(backups[:-1])):
+        if newer.exists():
+            os.replace(newer, older)
+    backups[0].unlink(missing_ok=True)
+    try:
+        os.link(database, backups[0])
+    except OSError:
+        backups[0].write_bytes(database.read_bytes())
+
+
+def sync_directory(path: Path) -> None:
+    """Flushes a rename in the directory to disk where it is possible."""
+    try:
+        descriptor = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+def read_snapshot(database: Path):
+    """Loads a snapshot after checking its header and checksum.
+
+    Files without the header are plain pickles written by older versions.
+
+    Raises:
+        FileNotFoundError: There is no snapshot yet.
+        SnapshotError: The snapshot is truncated or corrupt.
+    """
+    with open(database, 'rb') as file:
+        header = file.read(HEADER.size)
+        if not header.startswith(MAGIC):
+            file.seek(0)
+            try:
+                return pickle.load(file)
+            except (pickle.UnpicklingError, EOFError, AttributeError,
+                    ImportError, IndexError, ValueError) as error:
+                raise SnapshotError(f"not a snapshot ({error!r})") from error
+        if len(header) < HEADER.size:
+            raise SnapshotError("truncated header")
+        _, compression, crc, length = HEADER.unpack(header)
+        payload = file.read(length)
+    if len(payload) != length:
+        raise SnapshotError(f"truncated, {len(payload)} of {length} bytes")
+    if zlib.crc32(payload) != crc:
+        raise SnapshotError("checksum mismatch")
+    try:
+        match compression:
+            case 1:
+                payload = zlib.decompress(payload)
+            case 2:
+                payload = lzma.decompress(payload)
+            case 0:
+                pass
+            case _:
+                raise SnapshotError(f"unknown compression {compression}")
+        return pickle.loads(payload)
+    except (zlib.error, lzma.LZMAError, pickle.UnpicklingError) as error:
+        raise SnapshotError(repr(error)) from error
+
+
 def read_file_check(func) -> callable:
-    """Decorator to handle file not found errors."""
+    """Decorator to handle file not found errors.
+
+    Only a missing file gives an empty book. A corrupt snapshot raises
+    SnapshotError, so the bot never overwrites it with an empty book.
+    """
     def inner(*args):
         try:
             return func(*args)
         except FileNotFoundError:
             return AddressBook()
+        except SnapshotError as error:
+            database = Path(args[0])
+            backups = [str(path) for path in backup_paths(database)
+                       if path.exists()]
+            raise SnapshotError(
+                f"Snapshot {database} is corrupt: {error}. Refusing to start "
+                "with an empty book, restore it from a backup"
+                f"{': ' + ', '.join(backups) if backups else ''}."
+            ) from error
 
     return inner
 
@@ -17,21 +179,39 @@ def read_file_check(func) -> callable:
 @read_file_check
 def read_file(database) -> dict:
     """Read the contents of a file containing contacts.
-        
+
         Returns:
             dict: A dictionary representing the contacts with names as keys
             and phone numbers as values.
         """
-    with open(database, 'rb') as file:
-        contacts_dict = pickle.load(file)
+    contacts_dict = read_snapshot(Path(database))
+    contacts_dict.rebuild_indexes()
     return contacts_dict
 
 def write_file(database, contacts_dict: dict) -> None:
     """Writes the given dictionary of contacts to a file.
 
+        The snapshot is streamed with the highest pickle protocol into
+        a temporary file, which is synced and then renamed over the old
+        one, so a crash leaves either the old or the new snapshot. The old
+        snapshot is kept as a rotated backup.
+
         Args:
             contacts_dict (dict): A dictionary representing the contacts, with
             names as keys and phone numbers as values.
         """
-    with open(database, 'wb') as file:
-        pickle.dump(contacts_dict, file)
+    database = Path(database)
+    temporary = database.with_name(f"{database.name}.tmp")
+    with open(temporary, 'wb', buffering=CHUNK_SIZE) as file:
+        file.write(bytes(HEADER.size))
+        writer = SnapshotWriter(file, COMPRESSION)
+        pickle.Pickler(writer, pickle.HIGHEST_PROTOCOL).dump(contacts_dict)
+        writer.finish()
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, COMPRESSIONS[COMPRESSION],
+                               writer.crc, writer.length))
+        file.flush()
+        os.fsync(file.fileno())
+    rotate_backups(database)
+    os.replace(temporary, database)
+    sync_directory(database.parent)
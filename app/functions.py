@@ -1,63 +1,34 @@
 """imports"""
 from datetime import datetime, timedelta
+import app.color as colors
 from app.color import color
-from app.record import Record
+from app.dates import format_date, parse_date
+from app.record import Record, normalize_phone
+
+
+PAGE_SIZE = 20
+SEARCH_LIMIT = 10
 
 class Decorators:
     """Collection of decorators for AddressBook
     """
     @staticmethod
-    def validate_one_arg(func):
-        """Decorator to validate functions with 1 argument."""
-        def inner(contacts, args):
-            if len(args) != 1:
-                return 'no name for search'
-            contact_name = args[0]
-            if contact_name not in contacts:
-                return 'phone not in contacts'
-            return func(contacts, contact_name)
-
-        return inner
-
-    @staticmethod
-    def validate_two_args(func):
-        """Decorator to validate functions with 2 arguments."""
-        def inner(contacts, args):
-            if len(args) != 2:
-                return 'invalid args'
-            phone = args[1]
-            if len(phone) != 10:
-                return f'invalid phone {phone}'
-            return func(contacts, args)
-
-        return inner
-
-    @staticmethod
-    def validate_birthday(func):
-        """Decorator to validate functions with 2 arguments."""
-        def inner(contacts, args):
-            if len(args) != 2:
-                return 'invalid args'
-            name = args[0]
-            date = args[1]
-            try:
-                datetime.strptime(date, "%d.%m.%Y")
-                return func(contacts, name, date)
-            except ValueError:
-                return f"{color("Date doesn't exist", 'red')}"
+    def reading(func):
+        """Decorator running a method under the read lock of the book."""
+        def inner(contacts, *args):
+            with contacts.lock.read():
+                return func(contacts, *args)
 
         return inner
 
     @staticmethod
-    def validate_three_args(func):
-        """Decorator to validate functions with 3 arguments."""
+    def writing(func):
+        """Decorator running a method under the write lock of the book
+        and counting it as a change for autosave."""
         def inner(contacts, *args):
-            if len(args) != 3:
-                return 'invalid args'
-            phone1, phone2 = args[1], args[2]
-            if len(phone1) != 10 and len(phone2) != 10:
-                return 'invalid phones.'
-            return func(contacts, *args)
+            with contacts.lock.write():
+                contacts.changes += 1
+                return func(contacts, *args)
 
         return inner
 
@@ -72,8 +43,7 @@ class Decorators:
                     - contacts: The contact list or dictionary.
                     - new_record: The newly created Record object.
         """
-        def inner(contacts, args):
-            new_name, new_phone = args
+        def inner(contacts, new_name, new_phone):
             new_record = Record(new_name)
             new_record.add_phone(new_phone)
             return func(contacts, new_record)
@@ -81,6 +51,94 @@ class Decorators:
         return inner
 
 
+
+# Validators of command arguments, declared on commands of the registry
+# (see app/commands.py). The number of arguments is already checked by
+# the command. A validator returns the arguments for the handler, parsed
+# and normalized, or an error message.
+
+def name_and_phone(args: list):
+    """Validates a name and a phone number. The phone may be typed with
+    spaces, e.g. '+38 (050) 123-45-67', its parts are joined."""
+    if len(args) < 2:
+        return 'invalid args'
+    phone = ' '.join(args[1:])
+    try:
+        return [args[0], normalize_phone(phone)]
+    except ValueError:
+        return f'invalid phone {phone}'
+
+def name_and_phones(args: list):
+    """Validates a name, an old and a new phone number. Phones may be
+    typed with spaces, the parts are split where both halves are valid
+    numbers, and only if there is one such place."""
+    if len(args) < 3:
+        return 'invalid args'
+    parts = args[1:]
+    found = set()
+    for middle in range(1, len(parts)):
+        try:
+            found.add((normalize_phone(' '.join(parts[:middle])),
+                       normalize_phone(' '.join(parts[middle:]))))
+        except ValueError:
+            continue
+    if len(found) != 1:
+        return 'invalid phones.'
+    return [args[0], *found.pop()]
+
+def name_and_date(args: list):
+    """Validates a name and a date in the format 'DD.MM.YYYY'."""
+    try:
+        parse_date(args[1])
+    except ValueError:
+        return f"{color("Date doesn't exist", 'red')}"
+    return args
+
+def page_args(args: list):
+    """Validates an optional page number and page size."""
+    try:
+        numbers = [int(arg) for arg in args]
+    except ValueError:
+        return 'invalid args'
+    if any(number < 1 for number in numbers):
+        return 'invalid args'
+    if not numbers:
+        return []
+    return (numbers + [PAGE_SIZE])[:2]
+
+def birthday_range(args: list):
+    """Turns 'birthdays' arguments into the first and the last day:
+    nothing for the next week, a number of days, or two dates."""
+    today = datetime.today().date()
+    match args:
+        case []:
+            return [today, today + timedelta(days=7)]
+        case [days] if days.isdigit():
+            return [today, today + timedelta(days=min(int(days), 365))]
+        case [start, end]:
+            try:
+                first, last = parse_date(start), parse_date(end)
+            except ValueError:
+                return f"{color("Date doesn't exist", 'red')}"
+            if last < first:
+                return 'invalid args'
+            # Compared as a difference, first + 365 days may not exist
+            # near the end of the calendar.
+            if (last - first).days > 365:
+                last = first + timedelta(days=365)
+            return [first, last]
+    return 'invalid args'
+
+def search_args(args: list):
+    """Validates a search query and an optional number of results."""
+    if len(args) == 1:
+        return [args[0], SEARCH_LIMIT]
+    try:
+        return [args[0], int(args[1])]
+    except ValueError:
+        return 'invalid args'
+
+
 def find_next_weekday(start_date, weekday) -> datetime:
     """Finds the date of the next specified weekday after the given start date.
 
@@ -123,29 +181,32 @@ def date_to_string(date: datetime) -> str:
         str: The string representation of the date in the format 'DD.MM.YYYY'.
     """
     try:
-        return date.strftime("%d.%m.%Y")
+        return format_date(date)
     except AttributeError:
         return 'No date added.'
 
-def stringify_birthdays(list_of_birthdays: list) -> str:
+def stringify_birthdays(list_of_birthdays):
     """Creates a formatted string representation of a list of birthdays.
 
+    Lines are yielded one by one, so any iterable of birthdays can be
+    streamed to the output.
+
     Args:
-        list_of_birthdays (list): A list of dictionaries containing 'name'
+        list_of_birthdays (iterable): Dictionaries containing 'name'
             and 'congratulation_date' keys.
 
-    Returns:
-        str: A formatted string representing the list of birthdays.
+    Yields:
+        str: A formatted line for every birthday.
 
     Example:
         >birthdays = [{'name': 'John Doe', 'congratulation_date': '31-12-2024'}, 
         >           {'name': 'Jane Smith', 'congratulation_date': '01-01-2025'}]
-        >stringify_birthdays(birthdays)
+        >list(stringify_birthdays(birthdays))
         'John Doe......................31-12-2024'
         'Jane Smith...................01-01-2025'
     """
-    output_string = ''
+    palette = colors.palette()
+    green, cyan = palette['green'], palette['cyan']
     for item in list_of_birthdays:
-        output_string += f"{color(item['name'], 'green').ljust(30, '.')}" \
-                        f"{color(item['congratulation_date'], 'cyan')}\n"
-    return output_string
+        yield f"{(green + item['name']).ljust(30, '.')}" \
+            f"{cyan}{item['congratulation_date']}\n"
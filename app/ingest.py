@@ -0,0 +1,242 @@
+"""imports"""
+import csv
+from collections import deque
+from itertools import islice
+from pathlib import Path
+from app.dates import format_date
+from app.record import Birthday, Phone
+
+
+BATCH_SIZE = 1000
+PARALLEL_BATCH_SIZE = 20000
+WORKERS = 1
+# Header row written by 'export_contacts' to CSV files.
+CSV_HEADER = ['name', 'phones', 'birthday']
+
+
+def set_workers(count: int) -> None:
+    """Sets the number of processes validating imported rows.
+
+    Args:
+        count (int): Number of worker processes, 1 for serial import.
+    """
+    global WORKERS
+    WORKERS = max(1, count)
+
+
+def read_csv(source):
+    """Reads contacts from CSV lines one row at a time.
+
+    Columns are name, phones separated by ';' and birthday 'DD.MM.YYYY'.
+    The first row is skipped if it is CSV_HEADER, other rows are contacts
+    even if the name is 'name'.
+
+    Args:
+        source (Iterable[str]): Lines of a CSV file.
+
+    Yields:
+        list: Raw fields of a contact.
+    """
+    rows = csv.reader(source)
+    for row in rows:
+        if row and [field.strip().lower() for field in row] != CSV_HEADER:
+            yield row
+        break
+    for row in rows:
+        if row:
+            yield row
+
+
+def read_vcard(source):
+    """Reads contacts from vCard lines one card at a time.
+
+    Only FN, TEL and BDAY properties are used. BDAY in 'YYYY-MM-DD' or
+    'YYYYMMDD' form is converted to 'DD.MM.YYYY'.
+
+    Args:
+        source (Iterable[str]): Lines of a vCard file.
+
+    Yields:
+        list: Raw fields of a contact: name, phones and birthday.
+    """
+    card = None
+    for line in source:
+        line = line.strip()
+        key, _, value = line.partition(':')
+        key = key.split(';')[0].upper()
+        if key == 'BEGIN':
+            card = ['', [], '']
+        elif card is None:
+            continue
+        elif key == 'FN':
+            card[0] = value.strip()
+        elif key == 'TEL':
+            card[1].append(''.join(char for char in value if char.isdigit()))
+        elif key == 'BDAY':
+            digits = value.replace('-', '')
+            card[2] = f"{digits[6:8]}.{digits[4:6]}.{digits[:4]}"
+        elif key == 'END':
+            yield [card[0], ';'.join(card[1]), card[2]]
+            card = None
+
+
+def validate_rows(rows: list) -> tuple:
+    """Validates a batch of raw rows with the rules of Phone and Birthday.
+
+    Args:
+        rows (list): Raw fields of contacts.
+
+    Returns:
+        tuple: List of valid contacts as (name, phones, birthday ordinal or
+            None) and list of rejected rows as (row, reason).
+    """
+    valid, rejected = [], []
+    for row in rows:
+        try:
+            if len(row) > 3 or not row[0].strip() or ' ' in row[0].strip():
+                raise ValueError('Wrong name or number of columns')
+            row = (list(row) + ['', ''])[:3]
+            contact_name = row[0].strip()
+            phones = tuple(
+                Phone(phone.strip()).value
+                for phone in row[1].split(';') if phone.strip()
+            )
+            birth_date = row[2].strip()
+            ordinal = Birthday(birth_date).ordinal if birth_date else None
+        except ValueError as error:
+            rejected.append((row, str(error)))
+            continue
+        valid.append((contact_name, phones, ordinal))
+    return valid, rejected
+
+
+def batches(rows, size: int = BATCH_SIZE):
+    """Splits an iterable of rows into lists of at most 'size' rows.
+
+    Args:
+        rows (Iterable): The rows.
+        size (int, optional): Size of a batch. Defaults to BATCH_SIZE.
+
+    Yields:
+        list: The next batch.
+    """
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def validated_batches(rows, workers: int = 1):
+    """Validates rows batch by batch, in worker processes if asked to.
+
+    Results are yielded in the order of the input, so merging them gives
+    the same book as the serial path. At most two batches per worker are
+    in flight, so the input is still read incrementally.
+
+    Args:
+        rows (Iterable): Raw rows.
+        workers (int, optional): Number of worker processes.
+
+    Yields:
+        tuple: Valid contacts and rejected rows of a batch.
+    """
+    if workers <= 1:
+        for batch in batches(rows):
+            yield validate_rows(batch)
+        return
+    # Imported here, it pulls in multiprocessing at startup otherwise.
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(workers) as executor:
+        pending = deque()
+        for batch in batches(rows, PARALLEL_BATCH_SIZE):
+            pending.append(executor.submit(validate_rows, batch))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def merge_contacts(contacts, valid) -> None:
+    """Merges a batch of validated contacts into the address book.
+
+    Birthdays are built before the book is locked, the whole batch is
+    merged under one write lock, see AddressBook.merge_batch.
+
+    Args:
+        contacts (AddressBook): The address book.
+        valid (list): Contacts as returned by 'validate_rows'.
+    """
+    contacts.merge_batch([
+        (contact_name, phones,
+         Birthday.from_ordinal(ordinal) if ordinal else None)
+        for contact_name, phones, ordinal in valid
+    ])
+
+
+def import_contacts(contacts, path, rejects=None) -> str:
+    """Imports contacts from a CSV or vCard file into the address book.
+
+    The file is read incrementally and validated in batches, in WORKERS
+    processes when it is more than 1. Rows that do not pass validation are
+    written with the reason to the reject file instead of stopping the
+    import.
+
+    Args:
+        contacts (AddressBook): The address book.
+        path (str): Path to a '.csv' or '.vcf' file.
+        rejects (str, optional): Path of the reject file. Defaults to the
+            path of the imported file with '.rejects.csv' appended.
+
+    Returns:
+        str: A message with numbers of imported and rejected rows.
+    """
+    path = Path(path)
+    rejects = Path(rejects or f"{path}.rejects.csv")
+    reader = read_vcard if path.suffix.lower() == '.vcf' else read_csv
+    imported = rejected_count = 0
+    with open(path, 'r', encoding='utf-8', newline='') as source, \
+            open(rejects, 'w', encoding='utf-8', newline='') as reject_file:
+        reject_writer = csv.writer(reject_file)
+        for valid, rejected in validated_batches(reader(source), WORKERS):
+            merge_contacts(contacts, valid)
+            for row, reason in rejected:
+                reject_writer.writerow([*row, reason])
+            imported += len(valid)
+            rejected_count += len(rejected)
+    if not rejected_count:
+        rejects.unlink()
+    return f"Imported: {imported}, rejected: {rejected_count}."
+
+
+def export_contacts(contacts, path) -> str:
+    """Exports the address book to a CSV or vCard file.
+
+    Args:
+        contacts (AddressBook): The address book.
+        path (str): Path to a '.csv' or '.vcf' file.
+
+    Returns:
+        str: A message with number of exported contacts.
+    """
+    path = Path(path)
+    exported = 0
+    with open(path, 'w', encoding='utf-8', newline='') as target:
+        if path.suffix.lower() == '.vcf':
+            for contact_name, phones, birth_date in contacts.iter_contacts():
+                target.write(f"BEGIN:VCARD\nVERSION:3.0\nFN:{contact_name}\n")
+                for phone in phones:
+                    target.write(f"TEL:{phone}\n")
+                if birth_date:
+                    target.write(f"BDAY:{birth_date.isoformat()}\n")
+                target.write("END:VCARD\n")
+                exported += 1
+        else:
+            writer = csv.writer(target)
+            writer.writerow(CSV_HEADER)
+            for contact_name, phones, birth_date in contacts.iter_contacts():
+                writer.writerow([
+                    contact_name,
+                    ';'.join(phones),
+                    format_date(birth_date) if birth_date else ''
+                ])
+                exported += 1
+    return f"Exported: {exported}."
@@ -0,0 +1,114 @@
+"""imports"""
+import json
+from pathlib import Path
+from app.commands import COMMANDS
+from app.file import read_file, write_file
+
+
+# Commands too large to journal, the snapshot is compacted after them.
+COMPACT_AFTER = {"import"}
+
+
+class Journal:
+    """Append-only journal of AddressBook mutations.
+
+    Every mutating command is appended to the journal as one JSON line right
+    after it is executed, so a crash loses at most the command in progress.
+    On start the journal is replayed on top of the last snapshot written by
+    'write_file'. The snapshot is compacted (rewritten and the journal
+    truncated) every 'compact_every' entries and on exit.
+
+    Args:
+        database (Path): Path to the pickle snapshot of the address book.
+        reader (callable, optional): Function reading the snapshot.
+            Defaults to 'read_file'.
+        writer (callable, optional): Function writing the snapshot.
+            Defaults to 'write_file'.
+        compact_every (int, optional): Number of journal entries after which
+            the snapshot is rewritten. Defaults to 1000.
+
+    Methods:
+        - load: Read the snapshot and replay the journal on top of it.
+        - append: Write a mutation to the journal.
+        - compact: Rewrite the snapshot and truncate the journal.
+        - close: Compact and close the journal.
+    """
+    def __init__(self, database: Path, reader=read_file, writer=write_file,
+                 compact_every: int = 1000):
+        self.database = Path(database)
+        self.reader = reader
+        self.writer = writer
+        self.path = self.database.with_suffix('.journal')
+        self.compact_every = compact_every
+        self.entries = 0
+        self.file = None
+
+    def load(self):
+        """Read the snapshot and replay the journal on top of it.
+
+        Returns:
+            AddressBook: The restored address book.
+        """
+        contacts = self.reader(self.database)
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        command, *args = json.loads(line)
+                    except ValueError:
+                        # A torn last line of a crashed session.
+                        break
+                    try:
+                        COMMANDS[command].execute(contacts, args)
+                    except (KeyError, ValueError, TypeError):
+                        continue
+                    self.entries += 1
+        except FileNotFoundError:
+            pass
+        self.file = open(self.path, 'a', encoding='utf-8')
+        return contacts
+
+    def append(self, contacts, command: str, args: list) -> None:
+        """Write a mutation to the journal.
+
+        Args:
+            contacts (AddressBook): The address book the command was run on.
+            command (str): The executed command.
+            args (list): Arguments of the command.
+        """
+        if command in COMPACT_AFTER:
+            self.compact(contacts)
+            return
+        if command not in COMMANDS or not COMMANDS[command].mutates:
+            return
+        self.file.write(json.dumps([command, *args]) + '\n')
+        self.file.flush()
+        self.entries += 1
+        if self.entries >= self.compact_every:
+            self.compact(contacts)
+
+    def compact(self, contacts) -> None:
+        """Rewrite the snapshot and truncate the journal.
+
+        The snapshot is written before the journal is truncated. Replaying
+        commands already contained in the snapshot is harmless, because
+        every journaled command fails on a book that already has its effect.
+
+        Args:
+            contacts (AddressBook): The address book to save.
+        """
+        self.writer(self.database, contacts)
+        if self.file is not None:
+            self.file.close()
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.entries = 0
+
+    def close(self, contacts) -> None:
+        """Compact and close the journal.
+
+        Args:
+            contacts (AddressBook): The address book to save.
+        """
+        self.compact(contacts)
+        self.file.close()
+        self.file = None
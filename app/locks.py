@@ -0,0 +1,99 @@
+"""imports"""
+import threading
+
+
+class ReadWriteLock:
+    """Readers-writer lock for threads.
+
+    Any number of threads may read at the same time, a writer gets the
+    lock alone. Waiting writers are preferred over new readers, so reads
+    cannot starve writes. Both sides are reentrant: a thread may read or
+    write again while holding the lock, and may read while writing.
+
+    Methods:
+        - read: Context manager for a reader.
+        - write: Context manager for a writer.
+    """
+    __slots__ = ('condition', 'readers', 'writer', 'depth', 'waiting',
+                 '_read', '_write')
+
+    def __init__(self):
+        self.condition = threading.Condition(threading.Lock())
+        self.readers = {}
+        self.writer = None
+        self.depth = 0
+        self.waiting = 0
+        self._read = _Guard(self.acquire_read, self.release_read)
+        self._write = _Guard(self.acquire_write, self.release_write)
+
+    def acquire_read(self) -> None:
+        """Wait until reading is allowed."""
+        me = threading.get_ident()
+        with self.condition:
+            if self.writer == me:
+                self.depth += 1
+                return
+            if me not in self.readers:
+                while self.writer is not None or self.waiting:
+                    self.condition.wait()
+            self.readers[me] = self.readers.get(me, 0) + 1
+
+    def release_read(self) -> None:
+        """Finish reading."""
+        me = threading.get_ident()
+        with self.condition:
+            if self.writer == me:
+                self.depth -= 1
+                return
+            self.readers[me] -= 1
+            if not self.readers[me]:
+                del self.readers[me]
+                if not self.readers:
+                    self.condition.notify_all()
+
+    def acquire_write(self) -> None:
+        """Wait until writing is allowed."""
+        me = threading.get_ident()
+        with self.condition:
+            if self.writer == me:
+                self.depth += 1
+                return
+            if me in self.readers:
+                raise RuntimeError('Read lock cannot be upgraded')
+            self.waiting += 1
+            while self.writer is not None or self.readers:
+                self.condition.wait()
+            self.waiting -= 1
+            self.writer = me
+            self.depth = 1
+
+    def release_write(self) -> None:
+        """Finish writing."""
+        with self.condition:
+            self.depth -= 1
+            if not self.depth:
+                self.writer = None
+                self.condition.notify_all()
+
+    def read(self):
+        """Context manager for a reader."""
+        return self._read
+
+    def write(self):
+        """Context manager for a writer."""
+        return self._write
+
+
+class _Guard:
+    """Context manager calling acquire and release functions."""
+    __slots__ = ('acquire', 'release')
+
+    def __init__(self, acquire, release):
+        self.acquire = acquire
+        self.release = release
+
+    def __enter__(self):
+        self.acquire()
+
+    def __exit__(self, *exc_info):
+        self.release()
@@ -1,19 +1,84 @@
 """imports"""
-from datetime import datetime
-from app.color import color
+import sys
+from contextlib import nullcontext
+from datetime import date, datetime
+import app.color as colors
+from app.dates import parse_date
+
+
+NO_LOCK = nullcontext()
+# Characters people put into formatted numbers: '+38 (050) 123-45-67'.
+PHONE_SEPARATORS = str.maketrans('', '', ' -().')
+
+
+def normalize_phone(phone: str) -> str:
+    """Turns a formatted phone number into its canonical form: 10 digits,
+    without the '+38' or '8' prefix, interned so equal numbers share one
+    string.
+
+    Args:
+        phone (str): The phone number as typed, e.g. '+38 (050) 123-45-67'.
+
+    Returns:
+        str: The canonical number, e.g. '0501234567'.
+
+    Raises:
+        ValueError: If the number has no canonical form.
+    """
+    if len(phone) != 10 or not phone.isdigit() or not phone.isascii():
+        digits = phone.translate(PHONE_SEPARATORS).removeprefix('+')
+        if len(digits) == 12 and digits.startswith('38'):
+            digits = digits[2:]
+        elif len(digits) == 11 and digits.startswith('8'):
+            digits = digits[1:]
+        if len(digits) != 10 or not digits.isdigit() or not digits.isascii():
+            raise ValueError('Wrong phone format!')
+        phone = digits
+    return sys.intern(phone)
+
+
+def format_contact(contact_name: str, phones) -> str:
+    """Formats a contact for output.
+
+    Args:
+        contact_name (str): The name of the contact.
+        phones (iterable): Phone numbers of the contact as strings.
+
+    Returns:
+        str: The formatted contact.
+    """
+    palette = colors.palette()
+    return f"{palette['cyan']}Contact name: " \
+        f"{(palette['green'] + contact_name).ljust(30, '.')}" \
+        f" phones: {palette['cyan']}{'; '.join(phones)}"
 
 
 class Field:
-    """Class for storing data of str type"""
+    """Class for storing data of str type.
+
+    Fields use '__slots__' to keep contacts compact. '__setstate__' accepts
+    both slot state and the '__dict__' state of books pickled before.
+    """
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
     def __str__(self):
         return str(self.value)
 
+    def __getstate__(self):
+        return {'value': self.value}
+
+    def __setstate__(self, state):
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **state[1]}
+        self.value = state['value']
+
 
 class Name(Field):
     """Class for storing names of contacts. Str type of data."""
+    __slots__ = ()
 
 
 class Phone(Field):
@@ -22,39 +87,78 @@ class Phone(Field):
     Methods:
         - validate_phone: Validate a phone number format.
     """
+    __slots__ = ()
+
     def __init__(self, phone: str):
-        self.validate_phone(phone)
-        super().__init__(phone)
+        super().__init__(self.validate_phone(phone))
 
-    def validate_phone(self, phone: str) -> None:
+    def validate_phone(self, phone: str) -> str:
         """Validate a phone number format.
 
-        This method validates the format of a phone number by checking
-        its length and whether it consists of digits only. Raises
-        ValueError if the phone number format is incorrect.
+        This method normalizes the phone number with 'normalize_phone'.
+        Raises ValueError if the phone number format is incorrect.
 
         Args:
             phone (str): The phone number to validate.
+
+        Returns:
+            str: The canonical phone number.
         """
-        if len(phone) != 10 or not phone.isdigit():
-            raise ValueError('Wrong phone format!')
+        return normalize_phone(phone)
 
 
 class Birthday(Field):
     """A class representing a birthday, inheriting from Field.
 
+    The date is kept as a proleptic Gregorian ordinal.
+
     Args:
         birth_date (str): The birth date in the format 'DD.MM.YYYY'.
 
     Attributes:
-        birthday (datetime.date): The birthday date object.
+        value (datetime.date): The birthday date object.
+        birthday (datetime.date): Alias of 'value'.
     """
+    __slots__ = ('ordinal',)
+
     def __init__(self, birth_date: str):
         try:
-            self.birthday = datetime.strptime(birth_date, '%d.%m.%Y').date()
-            super().__init__(self.birthday)
+            birthday = parse_date(birth_date)
         except ValueError as e:
             raise ValueError("Invalid date format. Use DD.MM.YYYY") from e
+        self.ordinal = birthday.toordinal()
+
+    @classmethod
+    def from_ordinal(cls, ordinal: int) -> 'Birthday':
+        """Creates a birthday from a date ordinal without parsing.
+
+        Args:
+            ordinal (int): The proleptic Gregorian ordinal of the date.
+
+        Returns:
+            Birthday: The new birthday.
+        """
+        birthday = cls.__new__(cls)
+        birthday.ordinal = ordinal
+        return birthday
+
+    @property
+    def value(self) -> date:
+        """The birthday date object."""
+        return date.fromordinal(self.ordinal)
+
+    birthday = value
+
+    def __getstate__(self):
+        return {'ordinal': self.ordinal}
+
+    def __setstate__(self, state):
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **state[1]}
+        if 'ordinal' in state:
+            self.ordinal = state['ordinal']
+        else:
+            self.ordinal = state['value'].toordinal()
 
 
 class Record:
@@ -64,20 +168,85 @@ class Record:
         - add_phone: Add a phone number to the list of phones.
         - edit_phone: Edit an existing phone number in the list.
         - find_phone: Find a phone number in the list.
+        - add_phones: Add many normalized phone numbers at once.
         - remove_phone: Remove a phone number from the list.
+        - render: Line of the contact for listings, cached.
+
+    Phones are kept as a tuple of canonical, interned 10-digit strings,
+    see 'normalize_phone'.
+    Books pickled before, with lists of Phone objects, are migrated by
+    '__setstate__'.
     """
+    __slots__ = ('name', 'phones', 'birthday', 'book', 'rendered',
+                 'rendered_palette')
+
     def __init__(self, contact_name: str):
         self.name = Name(contact_name)
-        self.phones = []
+        self.phones = ()
         self.birthday = None
+        self.book = None
+        self.rendered = None
+        self.rendered_palette = None
 
     def __str__(self):
-        return (
-            f"{color('Contact name: ', 'cyan')}" \
-            f"{color(self.name.value, 'green').ljust(30, '.')}" \
-            f" phones: " \
-            f"{color('; '.join(phone.value for phone in self.phones), 'cyan')}"
+        return format_contact(self.name.value, self.phones)
+
+    def render(self) -> str:
+        """Line of the contact for listings, with a newline.
+
+        The line is cached until the phones change or colors are switched
+        off, so listing the book again does not format it again.
+
+        Returns:
+            str: The formatted contact.
+        """
+        # Two slots instead of a tuple: strings are not tracked by the
+        # garbage collector, so caching 100k lines does not trigger it.
+        palette = colors.palette()
+        if self.rendered is None or self.rendered_palette is not palette:
+            self.rendered = f"{format_contact(self.name.value, self.phones)}\n"
+            self.rendered_palette = palette
+        return self.rendered
+
+    def __getstate__(self):
+        return {
+            'name': self.name,
+            'phones': self.phones,
+            'birthday': self.birthday
+        }
+
+    def __setstate__(self, state):
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **state[1]}
+        self.name = state['name']
+        self.phones = tuple(
+            sys.intern(getattr(phone, 'value', phone))
+            for phone in state['phones']
         )
+        self.birthday = state['birthday']
+        self.book = None
+        self.rendered = None
+        self.rendered_palette = None
+
+    def copy(self):
+        """Returns a copy of the record that is not linked to a book.
+
+        Phones and birthday are replaced, never changed in place, so
+        sharing them with the copy is safe.
+        """
+        record = Record.__new__(Record)
+        record.name = self.name
+        record.phones = self.phones
+        record.birthday = self.birthday
+        record.book = None
+        record.rendered = None
+        record.rendered_palette = None
+        return record
+
+    def locked(self):
+        """Returns the write lock of the book owning the record, so changes
+        of phones and indexes are seen by other threads all at once."""
+        return self.book.lock.write() if self.book is not None else NO_LOCK
 
     def add_phone(self, phone_number: str) -> None:
         """Add a phone number to the list of phones.
@@ -88,11 +257,36 @@ class Record:
         Args:
             phone_number (str): The phone number to be added.
         """
-        if phone_number in [str(phone) for phone in self.phones]:
+        if not self.add_phones((Phone(phone_number).value,)):
             return 'This phone already in list'
-        self.phones.append(Phone(phone_number))
         return 'Phone added'
 
+    def add_phones(self, phone_numbers) -> int:
+        """Add many already normalized phone numbers, skipping the ones
+        that are in the list, with one set lookup per number.
+
+        Args:
+            phone_numbers (iterable): Canonical phone numbers.
+
+        Returns:
+            int: Number of added phones.
+        """
+        with self.locked():
+            known = set(self.phones)
+            added = []
+            for phone_number in phone_numbers:
+                if phone_number not in known:
+                    known.add(phone_number)
+                    added.append(phone_number)
+            if not added:
+                return 0
+            self.phones += tuple(added)
+            self.rendered = None
+            if self.book is not None:
+                for phone_number in added:
+                    self.book.index_phone(self.name.value, phone_number)
+        return len(added)
+
     def edit_phone(self, old_number: str, new_number: str):
         """Edit an existing phone number in the list.
 
@@ -104,14 +298,23 @@ class Record:
             new_number (str): The new phone number to replace the old one.
         """
         try:
-            Phone(new_number)
+            old_number = normalize_phone(old_number)
+            new_number = Phone(new_number).value
         except ValueError:
             return 'New number already in list.'
 
-        for number in self.phones:
-            if number.value == old_number:
-                number.value = new_number
-                break
+        with self.locked():
+            if new_number != old_number and new_number in self.phones:
+                return 'New number already in list.'
+            if old_number in self.phones:
+                self.phones = tuple(
+                    new_number if number == old_number else number
+                    for number in self.phones
+                )
+                self.rendered = None
+                if self.book is not None:
+                    self.book.unindex_phone(self.name.value, old_number)
+                    self.book.index_phone(self.name.value, new_number)
         return 'Phone changed'
 
     def find_phone(self, phone_number: str) -> str:
@@ -127,9 +330,13 @@ class Record:
             str: The found phone number if it exists in the list;
             otherwise, returns None.
         """
-        for number in self.phones:
-            if number.value == phone_number:
-                return phone_number
+        try:
+            phone_number = normalize_phone(phone_number)
+        except ValueError:
+            return None
+        if phone_number in self.phones:
+            return phone_number
+        return None
 
     def remove_phone(self, phone: str) -> None:
         """Remove a phone number from the list.
@@ -141,7 +348,16 @@ class Record:
         Args:
             phone (str): The phone number to be removed.
         """
-        self.phones.remove(self.find_phone(phone))
+        phone = normalize_phone(phone)
+        with self.locked():
+            if phone not in self.phones:
+                raise ValueError('Phone not in list')
+            self.phones = tuple(
+                number for number in self.phones if number != phone
+            )
+            self.rendered = None
+            if self.book is not None:
+                self.book.unindex_phone(self.name.value, phone)
 
     def add_birthday(self, birth_date: str) -> str:
         """Adds a birthday to the contact if not already present.
@@ -153,9 +369,13 @@ class Record:
             str: A message indicating whether the birthday was added or if it
                 was already present.
         """
-        if self.birthday:
-            return "Birthday already written"
-        self.birthday = Birthday(birth_date)
+        with self.locked():
+            if self.birthday:
+                return "Birthday already written"
+            self.birthday = Birthday(birth_date)
+            if self.book is not None:
+                self.book.index_birthday(self.name.value,
+                                         self.birthday.value)
         return 'Birthday added.'
 
     def show_birthday(self) -> datetime:
@@ -0,0 +1,195 @@
+"""imports"""
+from bisect import bisect_left, insort
+from collections import Counter
+
+
+SEPARATOR = '\x00'
+
+
+def bigrams(text: str) -> set:
+    """Returns the set of bigrams of a padded, case-folded text.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        set: Bigrams of the text.
+    """
+    text = f" {text.casefold()} "
+    return {text[index:index + 2] for index in range(len(text) - 1)}
+
+
+def edit_distance(first: str, second: str, limit: int) -> int:
+    """Computes the Levenshtein distance, giving up above the limit.
+
+    Args:
+        first (str): The first string.
+        second (str): The second string.
+        limit (int): The largest distance of interest.
+
+    Returns:
+        int: The distance, or limit + 1 if it is larger than the limit.
+    """
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    previous = list(range(len(second) + 1))
+    for row, first_char in enumerate(first, 1):
+        current = [row]
+        for column, second_char in enumerate(second, 1):
+            current.append(min(
+                previous[column] + 1,
+                current[column - 1] + 1,
+                previous[column - 1] + (first_char != second_char)
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class NameIndex:
+    """Index of contact names for prefix and fuzzy search.
+
+    Names are kept in a sorted list of case-folded keys for prefix queries
+    with bisect. Added names wait in a set and are merged into the list on
+    the next query, so bulk imports do not pay for an insertion into the
+    middle of the list per name. A bigram index, used to pick candidates
+    for bounded edit distance matching, is built on the first fuzzy query.
+
+    Methods:
+        - add: Add a name to the index.
+        - extend: Add many names at once.
+        - remove: Remove a name from the index.
+        - prefix: Names starting with a prefix.
+        - fuzzy: Names within an edit distance.
+    """
+    __slots__ = ('keys', 'pending', 'grams')
+
+    def __init__(self):
+        self.keys = []
+        self.pending = set()
+        self.grams = None
+
+    def flush(self) -> None:
+        """Merge names waiting in 'pending' into the sorted keys."""
+        if not self.pending:
+            return
+        new_keys = []
+        for key in sorted(self.pending):
+            index = bisect_left(self.keys, key)
+            if index == len(self.keys) or self.keys[index] != key:
+                new_keys.append(key)
+        self.pending = set()
+        if len(new_keys) < 64:
+            for key in new_keys:
+                insort(self.keys, key)
+            return
+        self.keys.extend(new_keys)
+        # Two sorted runs, merged by sort in linear time.
+        self.keys.sort()
+
+    def add(self, contact_name: str) -> None:
+        """Add a name to the index.
+
+        Args:
+            contact_name (str): The name of the contact.
+        """
+        key = f"{contact_name.casefold()}{SEPARATOR}{contact_name}"
+        self.pending.add(key)
+        if self.grams is not None:
+            for gram in bigrams(contact_name):
+                self.grams.setdefault(gram, set()).add(contact_name)
+
+    def extend(self, names) -> None:
+        """Add many names at once, sorting the keys only once.
+
+        Args:
+            names (Iterable[str]): Names of the contacts.
+        """
+        self.pending.update(
+            f"{contact_name.casefold()}{SEPARATOR}{contact_name}"
+            for contact_name in names
+        )
+        self.keys = sorted(set(self.keys) | self.pending)
+        self.pending = set()
+        self.grams = None
+
+    def remove(self, contact_name: str) -> None:
+        """Remove a name from the index.
+
+        Args:
+            contact_name (str): The name of the contact.
+        """
+        self.flush()
+        key = f"{contact_name.casefold()}{SEPARATOR}{contact_name}"
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            del self.keys[index]
+        if self.grams is None:
+            return
+        for gram in bigrams(contact_name):
+            names = self.grams.get(gram)
+            if names is not None:
+                names.discard(contact_name)
+                if not names:
+                    del self.grams[gram]
+
+    def prefix(self, query: str, limit: int) -> list:
+        """Names starting with a prefix, case-insensitive, sorted.
+
+        Args:
+            query (str): The prefix.
+            limit (int): Maximal number of names.
+
+        Returns:
+            list: The names.
+        """
+        self.flush()
+        query = query.casefold()
+        found = []
+        index = bisect_left(self.keys, query)
+        while index < len(self.keys) and len(found) < limit:
+            key = self.keys[index]
+            if not key.startswith(query):
+                break
+            found.append(key.split(SEPARATOR, 1)[1])
+            index += 1
+        return found
+
+    def fuzzy(self, query: str, max_distance: int, limit: int) -> list:
+        """Names within an edit distance of the query, closest first.
+
+        A name can only be that close if it shares enough bigrams with the
+        query, every edit changes at most two of them.
+
+        Args:
+            query (str): The query.
+            max_distance (int): The largest allowed edit distance.
+            limit (int): Maximal number of names.
+
+        Returns:
+            list: The names.
+        """
+        if self.grams is None:
+            self.flush()
+            self.grams = {}
+            for key in self.keys:
+                contact_name = key.split(SEPARATOR, 1)[1]
+                for gram in bigrams(contact_name):
+                    self.grams.setdefault(gram, set()).add(contact_name)
+        query_grams = bigrams(query)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self.grams.get(gram, ()))
+        needed = max(1, len(query_grams) - 2 * max_distance)
+        query = query.casefold()
+        matches = []
+        for contact_name, count in shared.items():
+            if count < needed:
+                continue
+            distance = edit_distance(query, contact_name.casefold(),
+                                     max_distance)
+            if distance <= max_distance:
+                matches.append((distance, contact_name))
+        matches.sort()
+        return [contact_name for _, contact_name in matches[:limit]]
@@ -0,0 +1,275 @@
+"""imports"""
+import asyncio
+import sys
+from app.color import disable_colors
+from app.commands import COMMANDS, dispatch
+
+
+TERMINATOR = b".\n"
+# Host of 'host:port' addresses without a host, only local clients.
+DEFAULT_HOST = "127.0.0.1"
+
+
+class ReadWriteLock:
+    """Asyncio lock letting many readers or one writer in.
+
+    Writers are preferred: once a writer waits, new readers wait too, so
+    a stream of reads cannot starve writes.
+
+    Methods:
+        - read: Context manager for a reader.
+        - write: Context manager for a writer.
+    """
+    def __init__(self):
+        self.readers = 0
+        self.writer = False
+        self.waiting_writers = 0
+        self.condition = asyncio.Condition()
+
+    async def acquire_read(self) -> None:
+        """Wait until reading is allowed."""
+        async with self.condition:
+            await self.condition.wait_for(
+                lambda: not self.writer and not self.waiting_writers
+            )
+            self.readers += 1
+
+    async def release_read(self) -> None:
+        """Finish reading."""
+        async with self.condition:
+            self.readers -= 1
+            self.condition.notify_all()
+
+    async def acquire_write(self) -> None:
+        """Wait until writing is allowed."""
+        async with self.condition:
+            self.waiting_writers += 1
+            await self.condition.wait_for(
+                lambda: not self.writer and not self.readers
+            )
+            self.waiting_writers -= 1
+            self.writer = True
+
+    async def release_write(self) -> None:
+        """Finish writing."""
+        async with self.condition:
+            self.writer = False
+            self.condition.notify_all()
+
+    def read(self):
+        """Context manager for a reader."""
+        return _Locked(self.acquire_read, self.release_read)
+
+    def write(self):
+        """Context manager for a writer."""
+        return _Locked(self.acquire_write, self.release_write)
+
+
+class _Locked:
+    """Async context manager calling acquire and release coroutines."""
+    def __init__(self, acquire, release):
+        self.acquire = acquire
+        self.release = release
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info):
+        await self.release()
+
+
+def run_command(contacts, command: str, args: list) -> str:
+    """Runs a command and renders its whole output into a string.
+
+    Args:
+        contacts (AddressBook): The address book.
+        command (str): The parsed command.
+        args (list): Arguments of the command.
+
+    Returns:
+        str: Output of the command.
+    """
+    try:
+        output = dispatch(contacts, command, args)
+        if not isinstance(output, str):
+            output = ''.join(output)
+    except Exception as error:
+        # Any failure is a reply, it must not drop the connection.
+        return f"Invalid command: {error!r}"
+    return output
+
+
+def encode_response(output: str) -> bytes:
+    """Encodes output as lines ended by a line with a single dot.
+
+    Lines of the output starting with a dot get one more dot, like in SMTP.
+
+    Args:
+        output (str): Output of a command.
+
+    Returns:
+        bytes: The response.
+    """
+    lines = output.rstrip('\n').split('\n')
+    body = ''.join(
+        f".{line}\n" if line.startswith('.') else f"{line}\n"
+        for line in lines
+    )
+    return body.encode() + TERMINATOR
+
+
+class BookServer:
+    """Line protocol server for an address book.
+
+    Every request is a line with a command as typed in the bot. Read
+    commands run concurrently in the default executor, commands changing
+    the book are serialized by a readers-writer lock. When the book has
+    changed it is saved by 'writer' in the executor at most once per
+    'save_interval' seconds and on shutdown.
+
+    Args:
+        contacts (AddressBook): The address book to serve.
+        parse (callable): Function splitting a line into command and args.
+        database (Path, optional): Path passed to 'writer'.
+        writer (callable, optional): Function saving the book.
+        save_interval (float, optional): Seconds between saves.
+            Defaults to 5.
+    """
+    def __init__(self, contacts, parse, database=None, writer=None,
+                 save_interval: float = 5.0):
+        self.contacts = contacts
+        self.parse = parse
+        self.database = database
+        self.writer = writer
+        self.save_interval = save_interval
+        self.lock = ReadWriteLock()
+        self.changes = 0
+
+    async def handle(self, command: str, args: list) -> str:
+        """Runs one command under the lock, off the event loop.
+
+        Args:
+            command (str): The parsed command.
+            args (list): Arguments of the command.
+
+        Returns:
+            str: Output of the command.
+        """
+        loop = asyncio.get_running_loop()
+        handler = COMMANDS.get(command)
+        if handler is not None and not handler.remote:
+            return f"Command '{command}' is not available over the network."
+        if handler is not None and handler.mutates:
+            async with self.lock.write():
+                output = await loop.run_in_executor(
+                    None, run_command, self.contacts, command, args
+                )
+                self.changes += 1
+            return output
+        async with self.lock.read():
+            return await loop.run_in_executor(
+                None, run_command, self.contacts, command, args
+            )
+
+    async def client(self, reader, writer) -> None:
+        """Serves one connection until it closes or sends 'exit'."""
+        try:
+            while line := await reader.readline():
+                try:
+                    line = line.decode().strip()
+                except UnicodeDecodeError as error:
+                    # A line that is not UTF-8 is a reply, like any error.
+                    writer.write(encode_response(
+                        f"Invalid command: {error!r}"))
+                    await writer.drain()
+                    continue
+                if not line:
+                    continue
+                command, *args = self.parse(line)
+                handler = COMMANDS.get(command)
+                if handler is not None and handler.stop:
+                    writer.write(encode_response(handler(self.contacts, args)))
+                    await writer.drain()
+                    break
+                writer.write(encode_response(await self.handle(command, args)))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def save(self) -> None:
+        """Saves the book in the executor if it has changed.
+
+        Changes are counted as saved only when the writer succeeds, so a
+        failed save is repeated by the next one.
+        """
+        if self.writer is None or not self.changes:
+            return
+        loop = asyncio.get_running_loop()
+        async with self.lock.read():
+            await loop.run_in_executor(
+                None, self.writer, self.database, self.contacts
+            )
+            # The read lock keeps commands changing the book out.
+            self.changes = 0
+
+    async def autosave(self) -> None:
+        """Saves changed book every 'save_interval' seconds."""
+        while True:
+            await asyncio.sleep(self.save_interval)
+            try:
+                await self.save()
+            except Exception as error:
+                # Keep serving, the next save may succeed.
+                print(f"Autosave failed: {error!r}", file=sys.stderr)
+
+    async def start(self, address: str):
+        """Starts listening on 'host:port' or 'unix:path'.
+
+        Args:
+            address (str): The address, ':port' listens on DEFAULT_HOST
+                only.
+
+        Returns:
+            asyncio.Server: The started server.
+        """
+        if address.startswith('unix:'):
+            return await asyncio.start_unix_server(self.client, address[5:])
+        host, _, port = address.rpartition(':')
+        return await asyncio.start_server(self.client, host or DEFAULT_HOST,
+                                          int(port))
+
+    async def serve(self, address: str) -> None:
+        """Serves the book until cancelled, then saves it.
+
+        Args:
+            address (str): 'host:port' or 'unix:path'.
+        """
+        server = await self.start(address)
+        saver = asyncio.create_task(self.autosave())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            saver.cancel()
+            await self.save()
+
+
+def serve(contacts, parse, address: str, database=None, writer=None) -> None:
+    """Runs the server until interrupted.
+
+    Args:
+        contacts (AddressBook): The address book to serve.
+        parse (callable): Function splitting a line into command and args.
+        address (str): 'host:port' or 'unix:path'.
+        database (Path, optional): Path passed to 'writer'.
+        writer (callable, optional): Function saving the book.
+    """
+    disable_colors()
+    server = BookServer(contacts, parse, database, writer)
+    print(f"Serving on {address}")
+    try:
+        asyncio.run(server.serve(address))
+    except KeyboardInterrupt:
+        pass
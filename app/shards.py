@@ -0,0 +1,390 @@
+"""imports"""
+import heapq
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from itertools import chain, islice
+from operator import itemgetter
+from pathlib import Path
+from app.autosave import Autosaver
+from app.book import file_error, format_birthdays, format_shared_phones
+from app.dates import parse_date
+from app.file import SnapshotError
+from app.functions import SEARCH_LIMIT
+from app.ingest import export_contacts, import_contacts
+from app.record import format_contact
+
+
+def shard_index(contact_name: str, count: int) -> int:
+    """Number of the shard holding a contact.
+
+    CRC32 of the name is used instead of 'hash', which changes between
+    runs, so a contact is found in the same file next time.
+
+    Args:
+        contact_name (str): The name of the contact.
+        count (int): Number of shards.
+
+    Returns:
+        int: The shard number from 0 to count - 1.
+    """
+    return zlib.crc32(contact_name.encode('utf-8')) % count
+
+def shard_paths(database, count: int) -> list:
+    """Files of the shards, e.g. contacts.0.pkl for app/contacts.pkl.
+
+    Args:
+        database (Path): Path of the unsharded contacts file.
+        count (int): Number of shards.
+
+    Returns:
+        list: A path for every shard.
+    """
+    database = Path(database)
+    return [database.with_name(f"{database.stem}.{index}{database.suffix}")
+            for index in range(count)]
+
+
+class ShardedBook:
+    """Contacts hashed by name across several AddressBook shards.
+
+    Every shard is a separate book with its own file, lock and autosave.
+    Commands taking a name go to the shard of that name. 'all' pages,
+    'birthdays', 'search', 'duplicates' and phone lookups ask every shard
+    in a thread pool and merge the results. Listing the whole book streams
+    the shards one after another.
+
+    Args:
+        shards (list): The books, shard number i holds names with
+            shard_index(name) == i.
+        paths (list): Files of the shards.
+        writer (callable): Function writing a shard to its file.
+
+    Methods:
+        - shard: The shard of a name.
+        - fan_out: Run a function on every shard in parallel.
+        - rebalance: Move contacts stored in a wrong shard.
+        - save: Write every shard to its file in parallel.
+        - autosavers: An Autosaver for every shard.
+    """
+    def __init__(self, shards: list, paths: list, writer):
+        self.shards = shards
+        self.paths = paths
+        self.writer = writer
+        self.executor = ThreadPoolExecutor(len(shards),
+                                           thread_name_prefix="shard")
+
+    def __contains__(self, contact_name) -> bool:
+        return contact_name in self.shard(contact_name)
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    @property
+    def changes(self) -> int:
+        """Number of changes made to all shards."""
+        return sum(shard.changes for shard in self.shards)
+
+    def shard(self, contact_name: str):
+        """The shard holding a contact.
+
+        Args:
+            contact_name (str): The name of the contact.
+
+        Returns:
+            AddressBook: The shard.
+        """
+        return self.shards[shard_index(contact_name, len(self.shards))]
+
+    def fan_out(self, func) -> list:
+        """Runs a function on every shard in parallel.
+
+        Args:
+            func (callable): Function taking a shard.
+
+        Returns:
+            list: Results in the order of the shards.
+        """
+        return list(self.executor.map(func, self.shards))
+
+    def rebalance(self) -> int:
+        """Moves contacts stored in a wrong shard, e.g. after the number
+        of shards has changed.
+
+        Returns:
+            int: Number of moved contacts.
+        """
+        moved = 0
+        for index, shard in enumerate(self.shards):
+            # Only names are hashed, records are read for moved contacts.
+            misplaced = [
+                contact_name for contact_name in shard.data
+                if shard_index(contact_name, len(self.shards)) != index
+            ]
+            for contact_name in misplaced:
+                contact = shard.data[contact_name]
+                self.shard(contact_name).merge(
+                    contact_name, contact.phones, contact.birthday
+                )
+                shard.delete(contact_name)
+            moved += len(misplaced)
+        return moved
+
+    def save(self) -> None:
+        """Writes every shard to its file in parallel."""
+        list(self.executor.map(self.writer, self.paths, self.shards))
+
+    def autosavers(self, interval: float, threshold: int) -> list:
+        """An Autosaver for every shard, saving it to its own file.
+
+        Args:
+            interval (float): Seconds between checks, see Autosaver.
+            threshold (int): Number of changes of a shard that triggers
+                its save.
+
+        Returns:
+            list: The autosavers, not started yet.
+        """
+        return [Autosaver(shard, path, self.writer, interval, threshold)
+                for shard, path in zip(self.shards, self.paths)]
+
+    def iter_contacts(self):
+        """Yield raw data of every contact, shard by shard."""
+        return chain.from_iterable(
+            shard.iter_contacts() for shard in self.shards
+        )
+
+    def add_record(self, contact_name: str, phone: str) -> str:
+        """Adds a new contact to its shard, see AddressBook.add_record."""
+        return self.shard(contact_name).add_record(contact_name, phone)
+
+    def add_phone(self, contact_name: str, phone: str) -> str:
+        """Adds a phone to a contact, see AddressBook.add_phone."""
+        return self.shard(contact_name).add_phone(contact_name, phone)
+
+    def change_phone(self, contact_name: str, old_phone: str,
+                     new_phone: str) -> str:
+        """Changes a phone of a contact, see AddressBook.change_phone."""
+        return self.shard(contact_name).change_phone(contact_name,
+                                                     old_phone, new_phone)
+
+    def birthday_date(self, contact_name: str, birth_date: str) -> str:
+        """Adds a birthday to a contact, see AddressBook.birthday_date."""
+        return self.shard(contact_name).birthday_date(contact_name,
+                                                      birth_date)
+
+    def find(self, contact_name: str):
+        """Finds a contact by name, see AddressBook.find."""
+        return self.shard(contact_name).find(contact_name)
+
+    def show_birth_date(self, contact_name: str) -> str:
+        """Shows the birthday of a contact, see
+        AddressBook.show_birth_date."""
+        return self.shard(contact_name).show_birth_date(contact_name)
+
+    def delete(self, contact_name: str) -> str:
+        """Deletes a contact from its shard, see AddressBook.delete."""
+        return self.shard(contact_name).delete(contact_name)
+
+    def merge(self, contact_name: str, phones, birthday=None) -> None:
+        """Merges validated data into a contact of its shard, see
+        AddressBook.merge."""
+        self.shard(contact_name).merge(contact_name, phones, birthday)
+
+    def merge_batch(self, contacts) -> None:
+        """Merges a batch of validated contacts, every shard merges its
+        part in parallel under its own write lock, see
+        AddressBook.merge_batch."""
+        parts = [[] for _ in self.shards]
+        for contact in contacts:
+            parts[shard_index(contact[0], len(self.shards))].append(contact)
+        list(self.executor.map(
+            lambda shard, part: part and shard.merge_batch(part),
+            self.shards, parts
+        ))
+
+    def find_by_phone(self, phone_number: str) -> str:
+        """Finds a contact by phone number in all shards.
+
+        Args:
+            phone_number (str): The phone number to search for.
+
+        Returns:
+            str: The name of the contact, from the first shard knowing the
+                number.
+        """
+        missing = "No contact found with this phone number"
+        for result in self.fan_out(lambda shard: shard.find_by_phone(
+                phone_number)):
+            if result != missing:
+                return result
+        return missing
+
+    def shared_phones(self) -> list:
+        """Finds phone numbers that belong to more than one contact, in
+        the same shard or in different ones.
+
+        Returns:
+            list: Tuples of a phone number and the names sharing it,
+                sorted by number.
+        """
+        # Only sets of numbers are collected from every shard, names are
+        # asked for the few shared numbers.
+        seen, shared = set(), set()
+        for numbers in self.fan_out(lambda shard: shard.phone_numbers()):
+            shared |= seen & numbers
+            seen |= numbers
+        for shard_shared in self.fan_out(lambda shard: shard.shared_phones()):
+            shared.update(phone_number for phone_number, _ in shard_shared)
+        owners = {}
+        for shard_owners in self.fan_out(
+                lambda shard: shard.phone_owners(shared)):
+            for phone_number, names in shard_owners:
+                owners.setdefault(phone_number, []).extend(names)
+        return sorted(owners.items())
+
+    def duplicates(self):
+        """Reports phone numbers shared between contacts of all shards."""
+        return format_shared_phones(self.shared_phones())
+
+    def show_all(self, page=None, size=None):
+        """Display all the contacts.
+
+        Without a page the shards are streamed one after another. For a
+        page every shard sorts its first page * size contacts and the
+        sorted lists are merged.
+
+        Yields:
+            str: The formatted contacts, one line at a time.
+        """
+        if page is None:
+            for shard in self.shards:
+                yield from shard.show_all()
+            return
+        parts = self.fan_out(lambda shard: shard.first_contacts(page * size))
+        merged = heapq.merge(*parts, key=itemgetter(0))
+        for _, line in islice(merged, (page - 1) * size, page * size):
+            yield line
+
+    def report_birthdays(self, first, last):
+        """Lists birthdays of all shards from the first to the last day
+        inclusive, see AddressBook.upcoming_birthdays.
+
+        Congratulation dates of a shard never go down, so the lists are
+        merged by date while the lines are streamed.
+        """
+        parts = self.fan_out(lambda shard: shard.upcoming_birthdays(first,
+                                                                    last))
+        upcoming = []
+        if any(parts):
+            upcoming = heapq.merge(*parts,
+                                   key=lambda item: parse_date(item[1]))
+        return format_birthdays(upcoming, first, last)
+
+    def get_upcoming_birthdays(self, days=7):
+        """Birthdays of the next 'days' days, see
+        AddressBook.get_upcoming_birthdays."""
+        today = date.today()
+        return self.report_birthdays(
+            today, today + timedelta(days=min(days, 365))
+        )
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT):
+        """Searches contacts of all shards by the beginning of a name or
+        by a name with typos, see AddressBook.search.
+
+        Names starting with the query come first, sorted, then the
+        similar ones.
+        """
+        found = chain.from_iterable(self.fan_out(
+            lambda shard: shard.search_names(query, limit)
+        ))
+        folded = query.casefold()
+        names = sorted(found, key=lambda name: (
+            not name.casefold().startswith(folded), name.casefold()
+        ))
+        if not names:
+            return 'No contacts found.'
+        return (
+            f"{format_contact(name, self.shard(name).data[name].phones)}\n"
+            for name in names[:limit]
+        )
+
+    def import_file(self, path: str, rejects: str = None) -> str:
+        """Imports contacts from a file into their shards, see
+        AddressBook.import_file."""
+        try:
+            return import_contacts(self, path, rejects)
+        except FileNotFoundError:
+            return 'File not found.'
+        except (OSError, UnicodeError) as error:
+            return file_error(path, error)
+
+    def export_file(self, path: str) -> str:
+        """Exports contacts of all shards to a file, see
+        AddressBook.export_file."""
+        try:
+            return export_contacts(self, path)
+        except (OSError, UnicodeError) as error:
+            return file_error(path, error)
+
+
+def read_shards(database, count: int, reader, writer) -> ShardedBook:
+    """Reads the shards of a book in parallel.
+
+    Contacts found in a wrong shard, because the number of shards has
+    changed, are moved to the right one. If there are no shard files yet,
+    the unsharded file is copied to the file of the first shard through
+    the reader and the writer and split from there, so the unsharded file
+    is left in place. Files of more shards than 'count' are never ignored, the
+    book is not read instead, see SnapshotError.
+
+    Args:
+        database (Path): Path of the unsharded contacts file.
+        count (int): Number of shards.
+        reader (callable): Function reading a book from a file.
+        writer (callable): Function writing a book to a file.
+
+    Returns:
+        ShardedBook: The book.
+
+    Raises:
+        SnapshotError: If files of more than 'count' shards exist.
+    """
+    found = count
+    while shard_paths(database, found + 1)[-1].exists():
+        found += 1
+    if found > count:
+        raise SnapshotError(
+            f"The book is split into {found} shards, but {count} were "
+            f"asked for. Contacts of the other shards would be lost, start "
+            f"with '--shards {found}'."
+        )
+    paths = shard_paths(database, count)
+    if not any(path.exists() for path in paths) and Path(database).exists():
+        writer(paths[0], reader(database))
+    with ThreadPoolExecutor(count) as executor:
+        shards = list(executor.map(reader, paths))
+    contacts = ShardedBook(shards, paths, writer)
+    contacts.rebalance()
+    return contacts
+
+def sharded_storage(count: int, reader, writer) -> tuple:
+    """Reader and writer of a book split into 'count' shards, used in
+    place of the reader and writer of a storage.
+
+    Args:
+        count (int): Number of shards.
+        reader (callable): Function reading a shard from its file.
+        writer (callable): Function writing a shard to its file.
+
+    Returns:
+        tuple: The reader and the writer of the sharded book.
+    """
+    def read(database) -> ShardedBook:
+        return read_shards(database, count, reader, writer)
+
+    def write(_database, contacts: ShardedBook) -> None:
+        contacts.save()
+
+    return read, write
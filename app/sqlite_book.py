@@ -0,0 +1,327 @@
+"""imports"""
+import sqlite3
+from collections.abc import MutableMapping
+from datetime import date
+from pathlib import Path
+from app.book import AddressBook
+from app.file import read_file
+from app.functions import Decorators
+from app.record import Record, Birthday, normalize_phone
+from app.search import edit_distance
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    name TEXT PRIMARY KEY
+);
+CREATE INDEX IF NOT EXISTS contacts_name_nocase
+    ON contacts(name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS phones (
+    name TEXT NOT NULL REFERENCES contacts(name) ON DELETE CASCADE,
+    phone TEXT NOT NULL,
+    PRIMARY KEY (name, phone)
+);
+CREATE INDEX IF NOT EXISTS phones_phone ON phones(phone);
+CREATE TABLE IF NOT EXISTS birthdays (
+    name TEXT PRIMARY KEY REFERENCES contacts(name) ON DELETE CASCADE,
+    ordinal INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    day INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS birthdays_month_day ON birthdays(month, day);
+"""
+
+
+def connect(database) -> sqlite3.Connection:
+    """Opens the database and creates tables and indexes if needed.
+
+    Args:
+        database (Path): Path to the database file.
+
+    Returns:
+        sqlite3.Connection: The connection.
+    """
+    connection = sqlite3.connect(database, check_same_thread=False)
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class SqliteRecords(MutableMapping):
+    """Mapping of contact names to records stored in SQLite.
+
+    Records are built from the tables on every access, changes made through
+    Record methods reach the tables through the index hooks of SqliteBook.
+
+    Args:
+        connection (sqlite3.Connection): Open database connection.
+        book (SqliteBook): The book owning the records.
+
+    Methods:
+        - raw_items: Yield raw contact data without building records.
+    """
+    def __init__(self, connection: sqlite3.Connection, book):
+        self.connection = connection
+        self.book = book
+
+    def __getitem__(self, contact_name: str) -> Record:
+        if contact_name not in self:
+            raise KeyError(contact_name)
+        contact = Record(contact_name)
+        contact.phones = tuple(phone for phone, in self.connection.execute(
+            "SELECT phone FROM phones WHERE name = ? ORDER BY rowid",
+            (contact_name,)
+        ))
+        row = self.connection.execute(
+            "SELECT ordinal FROM birthdays WHERE name = ?", (contact_name,)
+        ).fetchone()
+        if row:
+            contact.birthday = Birthday.from_ordinal(row[0])
+        contact.book = self.book
+        return contact
+
+    def __setitem__(self, contact_name: str, contact: Record) -> None:
+        if contact_name in self:
+            del self[contact_name]
+        self.connection.execute(
+            "INSERT INTO contacts (name) VALUES (?)", (contact_name,)
+        )
+        for phone in contact.phones:
+            self.book.index_phone(contact_name, phone)
+        if contact.birthday:
+            self.book.index_birthday(contact_name, contact.birthday.value)
+
+    def __delitem__(self, contact_name: str) -> None:
+        cursor = self.connection.execute(
+            "DELETE FROM contacts WHERE name = ?", (contact_name,)
+        )
+        if not cursor.rowcount:
+            raise KeyError(contact_name)
+
+    def __contains__(self, contact_name) -> bool:
+        return self.connection.execute(
+            "SELECT 1 FROM contacts WHERE name = ?", (contact_name,)
+        ).fetchone() is not None
+
+    def __iter__(self):
+        for contact_name, in self.connection.execute(
+                "SELECT name FROM contacts ORDER BY rowid"):
+            yield contact_name
+
+    def __len__(self) -> int:
+        return self.connection.execute(
+            "SELECT count(*) FROM contacts"
+        ).fetchone()[0]
+
+    def raw_items(self):
+        """Yield raw contact data without building records.
+
+        Yields:
+            tuple: Name, tuple of phone numbers and birthday date or None.
+        """
+        for contact_name, phones, ordinal in self.connection.execute(
+                "SELECT c.name, "
+                "(SELECT group_concat(phone, ';') FROM phones p "
+                "WHERE p.name = c.name), "
+                "b.ordinal "
+                "FROM contacts c LEFT JOIN birthdays b ON b.name = c.name "
+                "ORDER BY c.rowid"):
+            yield (
+                contact_name,
+                tuple(phones.split(';')) if phones else (),
+                date.fromordinal(ordinal) if ordinal else None
+            )
+
+
+class SqliteBook(AddressBook):
+    """Address book stored in SQLite.
+
+    Indexes of AddressBook are replaced by SQL indexes on name, phone and
+    birthday (month, day), so lookups are indexed queries and the book does
+    not have to fit in memory. Changes are committed by 'write_sqlite'.
+    """
+    # File of the database, set by 'read_sqlite'.
+    database = None
+
+    def index_phone(self, contact_name: str, phone_number: str) -> None:
+        """Stores a phone number of a contact."""
+        self.data.connection.execute(
+            "INSERT OR IGNORE INTO phones (name, phone) VALUES (?, ?)",
+            (contact_name, phone_number)
+        )
+
+    def unindex_phone(self, contact_name: str, phone_number: str) -> None:
+        """Deletes a phone number of a contact."""
+        self.data.connection.execute(
+            "DELETE FROM phones WHERE name = ? AND phone = ?",
+            (contact_name, phone_number)
+        )
+
+    def index_birthday(self, contact_name: str, birth_date: date) -> None:
+        """Stores the birthday of a contact."""
+        self.data.connection.execute(
+            "INSERT OR REPLACE INTO birthdays (name, ordinal, month, day) "
+            "VALUES (?, ?, ?, ?)",
+            (contact_name, birth_date.toordinal(),
+             birth_date.month, birth_date.day)
+        )
+        self.birthdays_version += 1
+        self.birthday_calendar.changed((birth_date.month, birth_date.day))
+
+    def unindex_birthday(self, contact_name: str, birth_date: date) -> None:
+        """Deletes the birthday of a contact."""
+        self.data.connection.execute(
+            "DELETE FROM birthdays WHERE name = ?", (contact_name,)
+        )
+        self.birthdays_version += 1
+        self.birthday_calendar.changed((birth_date.month, birth_date.day))
+
+    def rebuild_indexes(self) -> None:
+        """SQL indexes are kept by SQLite, nothing to rebuild."""
+
+    def names_born_on(self, key: tuple) -> list:
+        """Returns names of contacts born on the given (month, day)."""
+        return [contact_name for contact_name, in self.data.connection.execute(
+            "SELECT name FROM birthdays WHERE month = ? AND day = ?", key
+        )]
+
+    @Decorators.reading
+    def find_by_phone(self, phone_number: str) -> str:
+        """Finds the name of a contact by phone number."""
+        try:
+            phone_number = normalize_phone(phone_number)
+        except ValueError:
+            return "No contact found with this phone number"
+        row = self.data.connection.execute(
+            "SELECT name FROM phones WHERE phone = ? LIMIT 1", (phone_number,)
+        ).fetchone()
+        if row:
+            return row[0]
+        return "No contact found with this phone number"
+
+    @Decorators.reading
+    def shared_phones(self) -> list:
+        """Finds phone numbers shared between contacts with the phone
+        index of SQLite."""
+        shared = {}
+        for phone_number, contact_name in self.data.connection.execute(
+            "SELECT phone, name FROM phones WHERE phone IN "
+            "(SELECT phone FROM phones GROUP BY phone HAVING count(*) > 1) "
+            "ORDER BY phone, rowid"
+        ):
+            shared.setdefault(phone_number, []).append(contact_name)
+        return list(shared.items())
+
+    @Decorators.reading
+    def phone_numbers(self) -> set:
+        """Phone numbers of all contacts from the phone index of SQLite."""
+        return {phone_number for phone_number, in self.data.connection.execute(
+            "SELECT DISTINCT phone FROM phones"
+        )}
+
+    @Decorators.reading
+    def phone_owners(self, numbers) -> list:
+        """Names of contacts having the given phone numbers, looked up
+        with the phone index of SQLite."""
+        owners = []
+        for phone_number in numbers:
+            names = [contact_name for contact_name, in self.data.connection
+                     .execute("SELECT name FROM phones WHERE phone = ? "
+                              "ORDER BY rowid", (phone_number,))]
+            if names:
+                owners.append((phone_number, names))
+        return owners
+
+    @Decorators.reading
+    def search_names(self, query: str, limit: int) -> list:
+        """Finds names by prefix with the name index of SQLite, then names
+        similar to the query by scanning names."""
+        names = [contact_name for contact_name, in self.data.connection.execute(
+            "SELECT name FROM contacts WHERE name COLLATE NOCASE >= ? "
+            "AND name COLLATE NOCASE < ? ORDER BY name COLLATE NOCASE "
+            "LIMIT ?", (query, query + '\U0010ffff', limit)
+        )]
+        if len(names) < limit:
+            max_distance = 1 if len(query) <= 4 else 2
+            matches = []
+            for contact_name in self.data:
+                distance = edit_distance(query.casefold(),
+                                         contact_name.casefold(), max_distance)
+                if distance <= max_distance and contact_name not in names:
+                    matches.append((distance, contact_name))
+            matches.sort()
+            names += [name for _, name in matches[:limit - len(names)]]
+        return names
+
+    @Decorators.writing
+    def delete(self, contact_name: str) -> str:
+        """Deletes a contact, its phones and birthday."""
+        if contact_name not in self.data:
+            return 'phone not in contacts'
+        del self.data[contact_name]
+        # The birthday row is removed by the foreign key cascade.
+        self.birthdays_version += 1
+        return "Contact deleted"
+
+
+def read_sqlite(database) -> SqliteBook:
+    """Opens the SQLite address book.
+
+    If the database does not exist yet, contacts are migrated from the
+    pickle file next to it.
+
+    Args:
+        database (Path): Path to the database file.
+
+    Returns:
+        SqliteBook: The address book.
+    """
+    database = Path(database)
+    migrate = not database.exists()
+    contacts = SqliteBook()
+    contacts.database = database
+    contacts.data = SqliteRecords(connect(database), contacts)
+    if migrate:
+        old_contacts = read_file(database.with_suffix('.pkl'))
+        for contact_name, phones, birth_date in old_contacts.iter_contacts():
+            contacts.merge(
+                contact_name, phones,
+                Birthday.from_ordinal(birth_date.toordinal())
+                if birth_date else None
+            )
+        contacts.data.connection.commit()
+    return contacts
+
+
+def write_sqlite(database, contacts) -> None:
+    """Commits changes of the SQLite address book.
+
+    A SQLite book opened from another file is copied over the database
+    with the backup API, e.g. when a book is split into shards. Any other
+    AddressBook is merged into the database.
+
+    Args:
+        database (Path): Path to the database file.
+        contacts (AddressBook): The address book to save.
+    """
+    if isinstance(contacts, SqliteBook) and contacts.database is not None \
+            and Path(contacts.database).resolve() != Path(database).resolve():
+        contacts.data.connection.commit()
+        target = sqlite3.connect(database)
+        try:
+            contacts.data.connection.backup(target)
+        finally:
+            target.close()
+        return
+    if not isinstance(contacts, SqliteBook):
+        target = SqliteBook()
+        target.data = SqliteRecords(connect(database), target)
+        for contact_name, phones, birth_date in contacts.iter_contacts():
+            target.merge(
+                contact_name, phones,
+                Birthday.from_ordinal(birth_date.toordinal())
+                if birth_date else None
+            )
+        contacts = target
+    contacts.data.connection.commit()
@@ -0,0 +1,242 @@
+"""imports"""
+import json
+import os
+import threading
+from contextlib import nullcontext
+from time import perf_counter
+
+
+# Stages of a command, in the order they run.
+STAGES = ("parse", "validate", "execute", "format", "output", "persist")
+# Environment variable with the file for statistics, same as '--stats'.
+STATS_ENV = "BOT_STATS"
+NO_TIMER = nullcontext()
+
+
+class Histogram:
+    """Latency histogram with power of two buckets in microseconds.
+
+    Methods:
+        - add: Record one duration.
+        - percentile: Upper bound of the bucket holding a percentile.
+        - as_dict: Summary for the statistics file.
+    """
+    __slots__ = ('buckets', 'count', 'total', 'slowest')
+
+    def __init__(self):
+        self.buckets = [0] * 40
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+
+    def add(self, seconds: float) -> None:
+        """Record one duration.
+
+        Args:
+            seconds (float): The duration.
+        """
+        bucket = min(int(seconds * 1_000_000).bit_length(), 39)
+        self.buckets[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        self.slowest = max(self.slowest, seconds)
+
+    def percentile(self, share: float) -> float:
+        """Upper bound of the bucket holding a percentile, in seconds.
+
+        Args:
+            share (float): The percentile as a share, e.g. 0.99.
+
+        Returns:
+            float: Seconds, never more than the slowest duration.
+        """
+        rank = share * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return min((1 << bucket) / 1_000_000, self.slowest)
+        return self.slowest
+
+    def as_dict(self) -> dict:
+        """Summary for the statistics file."""
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(0.5),
+            "p99": self.percentile(0.99),
+            "max": self.slowest,
+            "buckets_us": {
+                f"<{1 << bucket}": count
+                for bucket, count in enumerate(self.buckets) if count
+            },
+        }
+
+
+class Timer:
+    """Context manager adding its duration to a histogram of Stats."""
+    __slots__ = ('stats', 'table', 'key', 'start')
+
+    def __init__(self, stats, table: dict, key: str):
+        self.stats = stats
+        self.table = table
+        self.key = key
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *_exc):
+        self.stats.add(self.table, self.key, perf_counter() - self.start)
+
+
+class Stats:
+    """Per command and per stage latency statistics of the bot.
+
+    Statistics are off until 'enable' is called. While they are off,
+    'stage' returns a shared no-op context manager and commands are run
+    without timing (see Command.timed), so the bot pays only for one
+    attribute check per command.
+
+    Methods:
+        - enable: Start collecting, optionally profiling one command.
+        - stage: Context manager timing a stage.
+        - add: Record a duration.
+        - profiled: Run a function under cProfile if it is the profiled
+            command.
+        - report: Text report for the 'stats' command.
+        - save: Write statistics (and the profile) to files.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.profile_command = None
+        self.profiler = None
+        self.profiled_runs = 0
+        self.commands = {}
+        self.stages = {}
+        self.lock = threading.Lock()
+        self.profile_lock = threading.Lock()
+
+    def enable(self, path=None, profile_command=None) -> None:
+        """Start collecting statistics.
+
+        Args:
+            path (str, optional): File the statistics are written to on
+                exit, as JSON.
+            profile_command (str, optional): Command to run under cProfile,
+                its profile is written next to the statistics file.
+        """
+        self.enabled = True
+        self.path = path
+        self.profile_command = profile_command
+        if profile_command:
+            # cProfile and pstats are imported only by profiled runs.
+            import cProfile
+            self.profiler = cProfile.Profile()
+
+    def stage(self, stage: str):
+        """Context manager timing a stage, a no-op when statistics are off.
+
+        Args:
+            stage (str): One of STAGES.
+        """
+        if not self.enabled:
+            return NO_TIMER
+        return Timer(self, self.stages, stage)
+
+    def add(self, table: dict, key: str, seconds: float) -> None:
+        """Record a duration.
+
+        Args:
+            table (dict): 'commands' or 'stages'.
+            key (str): The command or the stage.
+            seconds (float): The duration.
+        """
+        with self.lock:
+            histogram = table.get(key)
+            if histogram is None:
+                histogram = table[key] = Histogram()
+            histogram.add(seconds)
+
+    def profiled(self, command: str, func, *args):
+        """Run a function under cProfile if it runs the profiled command.
+
+        Args:
+            command (str): Name of the running command.
+            func (callable): The function to run.
+            args: Arguments of the function.
+
+        Returns:
+            Result of the function.
+        """
+        if command != self.profile_command:
+            return func(*args)
+        with self.profile_lock:
+            self.profiled_runs += 1
+            return self.profiler.runcall(func, *args)
+
+    def as_dict(self) -> dict:
+        """Statistics as a dictionary for the JSON file."""
+        with self.lock:
+            return {
+                "commands": {command: histogram.as_dict()
+                             for command, histogram in self.commands.items()},
+                "stages": {stage: self.stages[stage].as_dict()
+                           for stage in STAGES if stage in self.stages},
+            }
+
+    def report(self) -> str:
+        """Text report for the 'stats' command."""
+        if not self.enabled:
+            return f"Statistics are off, start the bot with '--stats FILE' " \
+                f"or {STATS_ENV}=FILE."
+        stats = self.as_dict()
+        lines = [f"{'command':<14}{'count':>8}{'mean ms':>10}"
+                 f"{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}\n"]
+        for title, table in (("", stats["commands"]),
+                             ("stage", stats["stages"])):
+            if title:
+                lines.append(f"{title:<14}\n")
+            for key, summary in table.items():
+                lines.append(
+                    f"{key:<14}{summary['count']:>8}"
+                    f"{summary['mean'] * 1000:>10.3f}"
+                    f"{summary['p50'] * 1000:>10.3f}"
+                    f"{summary['p99'] * 1000:>10.3f}"
+                    f"{summary['max'] * 1000:>10.3f}\n"
+                )
+        return ''.join(lines)
+
+    def save(self) -> None:
+        """Write statistics to the file given to 'enable', and the profile
+        of the profiled command to the same path with '.prof' added.
+
+        If the profiled command has not run, '.prof.txt' only says so and
+        there is no '.prof' file, pstats can not read an empty profile.
+        """
+        if not self.enabled or not self.path:
+            return
+        with open(self.path, 'w', encoding='utf-8') as file:
+            json.dump(self.as_dict(), file, indent=2)
+        if self.profiler is not None and not self.profiled_runs:
+            if os.path.exists(f"{self.path}.prof"):
+                os.remove(f"{self.path}.prof")
+            with open(f"{self.path}.prof.txt", 'w',
+                      encoding='utf-8') as file:
+                file.write(f"'{self.profile_command}' was not run, "
+                           "nothing was profiled.\n")
+        elif self.profiler is not None:
+            import pstats
+            self.profiler.dump_stats(f"{self.path}.prof")
+            with open(f"{self.path}.prof.txt", 'w',
+                      encoding='utf-8') as file:
+                pstats.Stats(self.profiler, stream=file) \
+                    .sort_stats('cumulative').print_stats(30)
+
+
+STATS = Stats()
+if os.environ.get(STATS_ENV):
+    STATS.enable(os.environ[STATS_ENV])
@@ -0,0 +1,252 @@
+"""imports"""
+import mmap
+import os
+import struct
+from collections.abc import MutableMapping
+from datetime import date
+from pathlib import Path
+from app.book import AddressBook
+from app.file import read_file, sync_directory
+from app.record import Record, Phone, Birthday
+
+
+MAGIC = b'ABK1'
+HEADER = struct.Struct('<4sQ')
+OFFSET = struct.Struct('<Q')
+SEPARATOR = b'\x1f'
+
+
+def encode_record(contact_name: str, phones, birth_date) -> bytes:
+    """Encodes contact data into one line of the store.
+
+    Args:
+        contact_name (str): The name of the contact.
+        phones (iterable): Phone numbers of the contact as strings.
+        birth_date (date): The birthday of the contact or None.
+
+    Returns:
+        bytes: The encoded line.
+    """
+    birthday = str(birth_date.toordinal()) if birth_date else ''
+    return SEPARATOR.join((
+        contact_name.encode(),
+        ';'.join(phones).encode(),
+        birthday.encode()
+    )) + b'\n'
+
+
+def decode_line(line: bytes) -> tuple:
+    """Decodes one line of the store into raw contact data.
+
+    Args:
+        line (bytes): The encoded line without trailing newline.
+
+    Returns:
+        tuple: Name, tuple of phone numbers and birthday date or None.
+    """
+    contact_name, phones, birthday = line.split(SEPARATOR)
+    return (
+        contact_name.decode(),
+        tuple(phones.decode().split(';')) if phones else (),
+        date.fromordinal(int(birthday)) if birthday else None
+    )
+
+
+class LazyRecords(MutableMapping):
+    """Mapping of contact names to records backed by a memory-mapped file.
+
+    The file starts with a header and a table of record offsets sorted by
+    name, so a single record is found with a binary search and decoded into
+    a Record only when it is requested. Decoded, added and deleted records
+    are kept in memory until the book is saved with 'write_store'.
+
+    Args:
+        database (Path): Path to the store file.
+
+    Methods:
+        - raw_items: Yield raw contact data without building records.
+        - raw_line: Return encoded line of a contact.
+        - close: Close the memory map.
+    """
+    def __init__(self, database: Path):
+        self.file = open(database, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{database} is not a contact store')
+        self.changed = {}
+        self.deleted = set()
+        self.extra = set()
+        self.book = None
+
+    def _line_at(self, index: int) -> bytes:
+        offset, = OFFSET.unpack_from(self.map, HEADER.size + index * 8)
+        return self.map[offset:self.map.find(b'\n', offset)]
+
+    def _name_at(self, index: int) -> str:
+        offset, = OFFSET.unpack_from(self.map, HEADER.size + index * 8)
+        return self.map[offset:self.map.find(SEPARATOR, offset)].decode()
+
+    def _find(self, contact_name: str) -> int:
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._name_at(middle) < contact_name:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self._name_at(low) == contact_name:
+            return low
+        return -1
+
+    def __getitem__(self, contact_name: str) -> Record:
+        if contact_name in self.changed:
+            return self.changed[contact_name]
+        if contact_name in self.deleted:
+            raise KeyError(contact_name)
+        index = self._find(contact_name)
+        if index < 0:
+            raise KeyError(contact_name)
+        contact_name, phones, birth_date = decode_line(self._line_at(index))
+        contact = Record(contact_name)
+        contact.phones = tuple(Phone(phone).value for phone in phones)
+        if birth_date:
+            contact.birthday = Birthday.from_ordinal(birth_date.toordinal())
+        contact.book = self.book
+        self.changed[contact_name] = contact
+        return contact
+
+    def __setitem__(self, contact_name: str, contact: Record) -> None:
+        self.changed[contact_name] = contact
+        self.deleted.discard(contact_name)
+        if self._find(contact_name) < 0:
+            self.extra.add(contact_name)
+
+    def __delitem__(self, contact_name: str) -> None:
+        if contact_name not in self:
+            raise KeyError(contact_name)
+        self.changed.pop(contact_name, None)
+        if contact_name in self.extra:
+            self.extra.remove(contact_name)
+        else:
+            self.deleted.add(contact_name)
+
+    def __contains__(self, contact_name) -> bool:
+        if contact_name in self.changed:
+            return True
+        return contact_name not in self.deleted \
+            and self._find(contact_name) >= 0
+
+    def __iter__(self):
+        for index in range(self.count):
+            contact_name = self._name_at(index)
+            if contact_name not in self.deleted:
+                yield contact_name
+        yield from list(self.extra)
+
+    def __len__(self) -> int:
+        return self.count - len(self.deleted) + len(self.extra)
+
+    def raw_items(self):
+        """Yield raw contact data without building records.
+
+        Yields:
+            tuple: Name, tuple of phone numbers and birthday date or None.
+        """
+        for index in range(self.count):
+            line = self._line_at(index)
+            contact_name = line[:line.find(SEPARATOR)].decode()
+            if contact_name in self.changed or contact_name in self.deleted:
+                continue
+            yield decode_line(line)
+        for contact in list(self.changed.values()):
+            yield (
+                contact.name.value,
+                contact.phones,
+                contact.birthday.value if contact.birthday else None
+            )
+
+    def raw_line(self, contact_name: str) -> bytes:
+        """Return encoded line of a contact.
+
+        Untouched contacts are copied from the map without decoding.
+
+        Args:
+            contact_name (str): The name of the contact.
+
+        Returns:
+            bytes: The encoded line.
+        """
+        if contact_name not in self.changed:
+            index = self._find(contact_name)
+            if index >= 0 and contact_name not in self.deleted:
+                return self._line_at(index) + b'\n'
+        contact = self[contact_name]
+        return encode_record(
+            contact_name,
+            contact.phones,
+            contact.birthday.value if contact.birthday else None
+        )
+
+    def close(self) -> None:
+        """Close the memory map."""
+        self.map.close()
+        self.file.close()
+
+
+def read_store(database) -> AddressBook:
+    """Open a contact store without decoding its records.
+
+    If the store does not exist yet, the pickle file next to it is read,
+    so an existing book is migrated on the next save.
+
+    Args:
+        database (Path): Path to the store file.
+
+    Returns:
+        AddressBook: The address book backed by the store.
+    """
+    database = Path(database)
+    if not database.exists():
+        return read_file(database.with_suffix('.pkl'))
+    contacts = AddressBook()
+    contacts.data = LazyRecords(database)
+    contacts.rebuild_indexes()
+    return contacts
+
+
+def write_store(database, contacts: AddressBook) -> None:
+    """Write the address book to a contact store.
+
+    Records are written sorted by name to a temporary file that is flushed
+    to disk and then replaces the store, like snapshots of app/file.py.
+
+    Args:
+        database (Path): Path to the store file.
+        contacts (AddressBook): The address book to save.
+    """
+    database = Path(database)
+    data = contacts.data
+    names = sorted(data)
+    temp = database.with_suffix('.tmp')
+    with open(temp, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, len(names)))
+        file.write(bytes(OFFSET.size * len(names)))
+        offsets = []
+        for contact_name in names:
+            offsets.append(file.tell())
+            if isinstance(data, LazyRecords):
+                file.write(data.raw_line(contact_name))
+            else:
+                contact = data[contact_name]
+                file.write(encode_record(
+                    contact_name,
+                    contact.phones,
+                    contact.birthday.value if contact.birthday else None
+                ))
+        file.seek(HEADER.size)
+        file.write(struct.pack(f'<{len(offsets)}Q', *offsets))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp, database)
+    sync_directory(database.parent)
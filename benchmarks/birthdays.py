@@ -0,0 +1,54 @@
+"""imports"""
+import argparse
+import time
+from datetime import date, timedelta
+from app.birthday_calendar import BirthdayCalendar
+from app.functions import birthday_range
+from benchmarks.synthetic import build_book
+
+def check_calendar_ends(book) -> None:
+    """Reports for the first and the last days of the calendar must not
+    overflow: a whole year lists every birthday once, the last day lists
+    the birthdays of 31 December.
+
+    Raises:
+        SystemExit: When a report is wrong.
+    """
+    for year in (1, 9999):
+        first, last = birthday_range([f"01.01.{year:04}", "31.12.9999"])
+        if len(book.upcoming_birthdays(first, last)) != book.birthdays_count:
+            raise SystemExit(f"year {year}: not every birthday is listed")
+    first, last = birthday_range(["31.12.9999", "31.12.9999"])
+    expected = [(name, "31.12.9999")
+                for name in book.names_born_on((12, 31))]
+    if sorted(book.upcoming_birthdays(first, last)) != sorted(expected):
+        raise SystemExit("31.12.9999: wrong birthdays")
+
+
+def main():
+    """Times reports of upcoming birthdays from the calendar table, the
+    first report of a year builds its table, later ones only read it."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, nargs="+", default=[7, 30, 365])
+    options = parser.parse_args()
+
+    book = build_book(options.count, birthday_share=1.0)
+    check_calendar_ends(book)
+
+    today = date.today()
+    for days in options.days:
+        last = today + timedelta(days=days)
+        # A fresh calendar, so the first report builds the tables again.
+        book.birthday_calendar = BirthdayCalendar(book)
+        timings = []
+        for _ in range(2):
+            start = time.perf_counter()
+            upcoming = book.upcoming_birthdays(today, last)
+            timings.append(time.perf_counter() - start)
+        print(f"{days:>4} days  build {timings[0]:8.3f}s  "
+              f"read {timings[1]:8.3f}s  {len(upcoming)} birthdays")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""imports"""
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+from app.dates import format_date, parse_date
+
+
+def main():
+    """Compares strptime/strftime with the cached DD.MM.YYYY parser and
+    formatter."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--count", type=int, default=1_000_000)
+    count = parser.parse_args().count
+
+    generator = random.Random(0)
+    first_day = date(1930, 1, 1)
+    dates = [first_day + timedelta(days=generator.randrange(36500))
+             for _ in range(count)]
+    texts = [value.strftime('%d.%m.%Y') for value in dates]
+
+    runs = [
+        ("strptime", lambda: [datetime.strptime(text, '%d.%m.%Y').date()
+                              for text in texts]),
+        ("parse_date", lambda: [parse_date(text) for text in texts]),
+        ("strftime", lambda: [value.strftime('%d.%m.%Y') for value in dates]),
+        ("format_date", lambda: [format_date(value) for value in dates]),
+    ]
+    results = {}
+    for name, run in runs:
+        start = time.perf_counter()
+        results[name] = run()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<12}{elapsed:8.2f}s {count / elapsed:12.0f} dates/s")
+    assert results["strptime"] == results["parse_date"]
+    assert results["strftime"] == results["format_date"]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""imports"""
+import argparse
+import re
+import timeit
+from app.book import AddressBook
+from app.color import color, check_txt
+from app.commands import dispatch
+from app.functions import name_and_date, name_and_phone, name_and_phones
+from bot import parse_input
+
+
+def legacy_parse_input(user_input: str) -> tuple:
+    """parse_input as it was before the command registry."""
+    cmd, *args = user_input.split()
+    cmd = cmd.strip().lower()
+    cmd = re.sub("[^A-Za-z]", "", cmd)
+    return cmd, *args
+
+
+def legacy_call(method, args: list, count: int, validator=None):
+    """Calls a method of the book with the checks its decorators made
+    before the validators moved to the command registry."""
+    if len(args) != count:
+        return 'invalid args'
+    if validator is not None:
+        args = validator(args)
+        if isinstance(args, str):
+            return args
+    return method(*args)
+
+def legacy_execute(contacts, command: str, args: list):
+    """The 'match' dispatcher used before the command registry."""
+    match command:
+        case "hello":
+            return check_txt('hello')
+        case "add":
+            return color(legacy_call(contacts.add_record, args, 2,
+                                     name_and_phone), 'yellow')
+        case "addbirthday":
+            return color(legacy_call(contacts.birthday_date, args, 2,
+                                     name_and_date), 'yellow')
+        case "change":
+            return color(legacy_call(contacts.change_phone, args, 3,
+                                     name_and_phones), 'yellow')
+        case "del":
+            return color(legacy_call(contacts.delete, args, 1), 'yellow')
+        case "phone":
+            return str(legacy_call(contacts.find, args, 1))
+        case "showbirthday":
+            return color(legacy_call(contacts.show_birth_date, args, 1),
+                         'green')
+        case _:
+            return check_txt("invalid command")
+
+def measure(parse, execute, contacts, line: str, number: int) -> float:
+    """Measures time of parsing and dispatching one command.
+
+    Returns:
+        float: Nanoseconds per command.
+    """
+    def run():
+        command, *args = parse(line)
+        execute(contacts, command, args)
+
+    return min(timeit.repeat(run, number=number, repeat=5)) / number * 1e9
+
+
+def main():
+    """Prints per-command dispatch overhead of the match block and the
+    command registry."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--number", type=int, default=100_000)
+    number = parser.parse_args().number
+
+    contacts = AddressBook()
+    contacts.add_record('Ann', '5555555555')
+    lines = ['hello', 'phone Ann', 'show-birthday Ann', 'unknown', 'add']
+    print(f"{'command':<20}{'match, ns':>12}{'registry, ns':>14}")
+    for line in lines:
+        legacy = measure(legacy_parse_input, legacy_execute, contacts,
+                         line, number)
+        current = measure(parse_input, dispatch, contacts, line, number)
+        print(f"{line:<20}{legacy:>12.0f}{current:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
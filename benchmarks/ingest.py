@@ -0,0 +1,53 @@
+"""imports"""
+import argparse
+import csv
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from app.book import AddressBook
+from app.ingest import import_contacts, set_workers
+
+
+def write_csv(path: Path, count: int) -> None:
+    """Writes a deterministic CSV file with some invalid rows."""
+    first_day = date(1960, 1, 1)
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['name', 'phones', 'birthday'])
+        for number in range(count):
+            phones = f"{number:010d};{(number * 31) % 10**10:010d}"
+            if number % 97 == 0:
+                phones = "12345"
+            birth_date = first_day + timedelta(days=number % 20000)
+            writer.writerow([f"Contact{number}", phones,
+                             birth_date.strftime('%d.%m.%Y')])
+
+
+def main():
+    """Times serial and parallel import and checks the results match."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--workers", type=int, nargs='+',
+                        default=[1, 2, 4, 8])
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'contacts.csv'
+        write_csv(path, options.rows)
+        expected = None
+        for workers in options.workers:
+            set_workers(workers)
+            contacts = AddressBook()
+            start = time.perf_counter()
+            message = import_contacts(contacts, path)
+            elapsed = time.perf_counter() - start
+            result = list(contacts.iter_contacts())
+            expected = expected or result
+            print(f"workers: {workers:>2}  {elapsed:7.2f}s  "
+                  f"{options.rows / elapsed:9.0f} rows/s  {message}  "
+                  f"{'same' if result == expected else 'DIFFERENT'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""imports"""
+import argparse
+import asyncio
+import random
+import time
+from app.server import BookServer, TERMINATOR
+from benchmarks.synthetic import build_book, generate_contacts
+from bot import parse_input
+
+
+async def open_connection(address: str):
+    """Connects to 'host:port' or 'unix:path'."""
+    if address.startswith('unix:'):
+        return await asyncio.open_unix_connection(address[5:])
+    host, _, port = address.rpartition(':')
+    return await asyncio.open_connection(host or None, int(port))
+
+
+async def client(address: str, requests: list, latencies: dict) -> None:
+    """Sends requests one after another and records their latencies."""
+    reader, writer = await open_connection(address)
+    for kind, line in requests:
+        start = time.perf_counter()
+        writer.write(f"{line}\n".encode())
+        await writer.drain()
+        while await reader.readline() != TERMINATOR:
+            pass
+        latencies[kind].append(time.perf_counter() - start)
+    writer.close()
+
+
+def make_requests(number: int, names: list, seed: int) -> list:
+    """Makes a mix of 'phone', 'birthdays' and 'add' requests."""
+    generator = random.Random(seed)
+    requests = []
+    for index in range(number):
+        kind = generator.choices(['phone', 'birthdays', 'add'],
+                                 weights=[8, 1, 1])[0]
+        if kind == 'phone':
+            line = f"phone {generator.choice(names)}"
+        elif kind == 'birthdays':
+            line = "birthdays"
+        else:
+            line = f"add New{seed}x{index} {generator.randrange(10**10):010d}"
+        requests.append((kind, line))
+    return requests
+
+
+async def run(options) -> None:
+    """Starts a server on a synthetic book and loads it with clients.
+    A server given by address should serve the same synthetic book, names
+    of requests are generated again."""
+    server = None
+    if options.address is None:
+        options.address = "127.0.0.1:8765"
+        book_server = BookServer(build_book(options.contacts), parse_input)
+        server = await book_server.start(options.address)
+    names = [contact_name for contact_name, _, _ in
+             generate_contacts(options.contacts)]
+    latencies = {'phone': [], 'birthdays': [], 'add': []}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(options.address,
+               make_requests(options.requests, names, seed),
+               latencies)
+        for seed in range(options.clients)
+    ))
+    elapsed = time.perf_counter() - start
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"clients: {options.clients}, requests: {total}, "
+          f"{total / elapsed:.0f} requests/s")
+    for kind, values in latencies.items():
+        if values:
+            values.sort()
+            p99 = values[min(len(values) - 1, int(len(values) * 0.99))]
+            print(f"{kind:<10} count: {len(values):>7}  "
+                  f"p50: {values[len(values) // 2] * 1000:.2f} ms  "
+                  f"p99: {p99 * 1000:.2f} ms")
+
+
+def main():
+    """Load generator for the address book server."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--address",
+                        help="server to load, by default one is started "
+                        "in-process on a synthetic book")
+    parser.add_argument("--contacts", type=int, default=10_000)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500,
+                        help="requests per client")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
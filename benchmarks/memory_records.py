@@ -0,0 +1,90 @@
+"""imports"""
+import argparse
+import gc
+import tracemalloc
+from datetime import date
+from app.record import Record
+from benchmarks.synthetic import generate_contacts
+
+
+class LegacyField:
+    """Dict based Field as it was before '__slots__'."""
+    def __init__(self, value):
+        self.value = value
+
+
+class LegacyBirthday(LegacyField):
+    """Birthday keeping both '.birthday' and '.value'."""
+    def __init__(self, birth_date: date):
+        self.birthday = birth_date
+        super().__init__(self.birthday)
+
+
+class LegacyRecord:
+    """Record with a list of Phone objects and '__dict__'."""
+    def __init__(self, contact_name: str):
+        self.name = LegacyField(contact_name)
+        self.phones = []
+        self.birthday = None
+
+
+def build_legacy(count: int) -> list:
+    """Builds contacts in the old dict based representation."""
+    contacts = []
+    for contact_name, phones, birth_date in generate_contacts(
+            count, birthday_share=1.0, max_phones=2):
+        contact = LegacyRecord(contact_name)
+        contact.phones = [LegacyField(phone) for phone in phones]
+        contact.birthday = LegacyBirthday(birth_date)
+        contacts.append(contact)
+    return contacts
+
+
+def build_compact(count: int) -> list:
+    """Builds contacts in the current slotted representation."""
+    contacts = []
+    for contact_name, phones, birth_date in generate_contacts(
+            count, birthday_share=1.0, max_phones=2):
+        contact = Record(contact_name)
+        for phone in phones:
+            contact.add_phone(phone)
+        contact.add_birthday(birth_date.strftime('%d.%m.%Y'))
+        contacts.append(contact)
+    return contacts
+
+
+def measure(builder, count: int) -> float:
+    """Measures memory held by built contacts.
+
+    Args:
+        builder (callable): Function building the contacts.
+        count (int): Number of contacts.
+
+    Returns:
+        float: Bytes per contact.
+    """
+    gc.collect()
+    tracemalloc.start()
+    contacts = builder(count)
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del contacts
+    return used / count
+
+
+def main():
+    """Prints bytes per contact before and after '__slots__'."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--count", type=int, default=1_000_000)
+    count = parser.parse_args().count
+
+    legacy = measure(build_legacy, count)
+    compact = measure(build_compact, count)
+    print(f"contacts: {count}")
+    print(f"legacy:   {legacy:.1f} bytes per contact")
+    print(f"compact:  {compact:.1f} bytes per contact")
+    print(f"saved:    {100 * (1 - compact / legacy):.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""imports"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from app.color import disable_colors
+from app.file import read_file, write_file
+from app.shards import sharded_storage
+from app.sqlite_book import read_sqlite, write_sqlite
+from benchmarks.synthetic import build_book
+
+STORAGES = {
+    "pickle": ("contacts.pkl", read_file, write_file),
+    "sqlite": ("contacts.db", read_sqlite, write_sqlite),
+}
+
+
+def best_time(func, repeats: int) -> float:
+    """The fastest of 'repeats' runs of a function, in seconds."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def lines(output) -> list:
+    """Lines of a command output, streamed output is read as a whole."""
+    if isinstance(output, str):
+        return output.splitlines()
+    return [line.rstrip("\n") for line in output]
+
+def operations() -> list:
+    """Operations timed on every book as (name, function of the book).
+    Results of a book are compared with the unsharded one as sets of
+    lines, since shards list contacts in another order."""
+    return [
+        ("page", lambda book: lines(book.show_all(50, 20))),
+        ("birthdays_30",
+         lambda book: lines(book.get_upcoming_birthdays(30))),
+        ("birthdays_365",
+         lambda book: lines(book.get_upcoming_birthdays(365))),
+        ("shared_phones", lambda book: [
+            (phone_number, tuple(sorted(names)))
+            for phone_number, names in book.shared_phones()
+        ]),
+        ("search", lambda book: lines(book.search("Olena", 20))),
+    ]
+
+def check_restarts(directory: Path, storage: str, shards: int,
+                   book) -> None:
+    """Splits an unsharded book into shards and restarts it twice, the
+    number of contacts in the shards and in the unsharded file, which is
+    left in place, must not change.
+
+    Raises:
+        SystemExit: When contacts are lost.
+    """
+    file_name, read, write = STORAGES[storage]
+    database = directory / f"restart.{shards}" / file_name
+    database.parent.mkdir()
+    write(database, book)
+    reader, writer = sharded_storage(shards, read, write)
+    counts = []
+    for _ in range(3):
+        sharded = reader(database)
+        counts.append(len(sharded))
+        writer(database, sharded)
+    counts.append(len(read(database)))
+    if counts != [len(book)] * len(counts):
+        raise SystemExit(f"{storage} with {shards} shards: "
+                         f"contacts after restarts {counts}, "
+                         f"expected {len(book)}")
+
+
+def main():
+    """Compares an unsharded book with books split into shards: loading,
+    saving and commands that ask every shard."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--shards", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--storage", choices=STORAGES, default="pickle")
+    options = parser.parse_args()
+    disable_colors()
+
+    file_name, read, write = STORAGES[options.storage]
+    with tempfile.TemporaryDirectory() as directory:
+        database = Path(directory) / file_name
+        book = build_book(options.count)
+        for count in options.shards:
+            check_restarts(Path(directory), options.storage, count, book)
+        write(database, book)
+        storages = [(1, read, write)] + [
+            (count, *sharded_storage(count, read, write))
+            for count in options.shards
+        ]
+        expected = {}
+        print(f"{'shards':>6} {'operation':<14}{'ms':>10}")
+        for count, reader, writer in storages:
+            # The first sharded read splits the unsharded file, the shards
+            # are written before reads are timed.
+            book = reader(database)
+            writer(database, book)
+            timings = {
+                "read": best_time(lambda: reader(database), options.repeats),
+                "write": best_time(lambda: writer(database, book),
+                                   options.repeats),
+            }
+            for name, operation in operations():
+                timings[name] = best_time(lambda: operation(book),
+                                          options.repeats)
+                result = set(operation(book))
+                if expected.setdefault(name, result) != result:
+                    print(f"{count:>6} {name:<14} DIFFERENT RESULT")
+            for name, seconds in timings.items():
+                print(f"{count:>6} {name:<14}{seconds * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
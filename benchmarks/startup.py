@@ -0,0 +1,81 @@
+"""imports"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+
+# Modules imported by bot.py, in the order of the import chain.
+CHAIN = ("bot", "app.file", "app.book", "app.functions", "app.record",
+         "app.color")
+# Heavy modules that should be imported only when they are used.
+LAZY = ("colorama", "asyncio", "multiprocessing", "cProfile")
+
+
+def wall_times(code: str, runs: int) -> list:
+    """Seconds of fresh interpreters running code, one per run."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def import_times() -> dict:
+    """Cumulative import time of every module in microseconds, parsed from
+    the output of 'python -X importtime'."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import bot"],
+        check=True, capture_output=True, text=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self, cumulative, module = line[len("import time:"):].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+def loaded_modules() -> list:
+    """Modules of LAZY that are imported together with bot.py."""
+    code = "import sys, bot; print(*(module for module in %r " \
+        "if module in sys.modules))" % (LAZY,)
+    result = subprocess.run([sys.executable, "-c", code], check=True,
+                            capture_output=True, text=True)
+    return result.stdout.split()
+
+
+def main():
+    """Measures the startup of the bot: wall time of importing bot.py in a
+    fresh interpreter and import times of the modules it imports."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--runs", type=int, default=10,
+                        help="fresh interpreters to time")
+    options = parser.parse_args()
+
+    # An empty interpreter is the floor the imports are added to.
+    for title, code in (("empty", "pass"), ("import bot", "import bot")):
+        timings = wall_times(code, options.runs)
+        print(f"{title:<16}min {min(timings) * 1000:>7.1f} ms, "
+              f"median {statistics.median(timings) * 1000:>7.1f} ms "
+              f"({options.runs} runs)")
+
+    times = import_times()
+    print(f"{'module':<16}{'cumulative ms':>14}")
+    for module in CHAIN:
+        if module in times:
+            print(f"{module:<16}{times[module] / 1000:>14.1f}")
+    slowest = sorted(
+        (item for item in times.items() if not item[0].startswith(
+            ("app.", "bot"))),
+        key=lambda item: item[1], reverse=True
+    )[:5]
+    print("slowest other imports: " + ", ".join(
+        f"{module} {micro / 1000:.1f} ms" for module, micro in slowest))
+    print("heavy modules imported: " + (", ".join(loaded_modules())
+                                        or "none"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""imports"""
+import argparse
+import threading
+import time
+from benchmarks.synthetic import build_book
+
+
+def writer(contacts, names: list, stop: threading.Event, stats: dict) -> None:
+    """Flips phones of odd contacts between two numbers."""
+    flips = 0
+    while not stop.is_set():
+        for number in range(1, len(names), 2):
+            old, new = f"{number:010d}", f"{number + 10**9:010d}"
+            if flips % 2:
+                old, new = new, old
+            contacts.change_phone(names[number], old, new)
+        flips += 1
+    stats['flips'] = flips
+
+
+def reader(contacts, names: list, stop: threading.Event, stats: list) -> None:
+    """Looks contacts up and checks that nothing is lost or torn.
+
+    Contact N has phone N, see 'generate_contacts'. Even contacts never
+    change, so every lookup of them must succeed. Odd contacts must always
+    have exactly one of their two phones.
+    """
+    lookups = lost = torn = 0
+    number = 0
+    while not stop.is_set():
+        number = (number + 7919) % len(names)
+        if number % 2 == 0:
+            if contacts.find_by_phone(f"{number:010d}") != names[number]:
+                lost += 1
+        else:
+            phones = contacts.find(names[number]).phones
+            if len(phones) != 1 or phones[0] not in (
+                    f"{number:010d}", f"{number + 10**9:010d}"):
+                torn += 1
+        lookups += 1
+    stats.append((lookups, lost, torn))
+
+
+def run(contacts, names: list, readers: int, seconds: float) -> tuple:
+    """Runs readers next to one writer for some seconds.
+
+    Returns:
+        tuple: Lookups per second, lost and torn lookups, writer flips.
+    """
+    stop = threading.Event()
+    reader_stats, writer_stats = [], {}
+    threads = [threading.Thread(target=writer,
+                                args=(contacts, names, stop, writer_stats))]
+    threads += [
+        threading.Thread(target=reader,
+                         args=(contacts, names, stop, reader_stats))
+        for _ in range(readers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    lookups = sum(stat[0] for stat in reader_stats)
+    lost = sum(stat[1] for stat in reader_stats)
+    torn = sum(stat[2] for stat in reader_stats)
+    return lookups / seconds, lost, torn, writer_stats['flips']
+
+
+def main():
+    """Stress test of concurrent lookups against a writer thread."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--contacts", type=int, default=10_000)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    options = parser.parse_args()
+
+    contacts = build_book(options.contacts, max_phones=1, unique_phones=True)
+    names = list(contacts.data)
+    failed = False
+    print(f"{'readers':>8}{'lookups/s':>12}{'lost':>6}{'torn':>6}"
+          f"{'writer passes':>15}")
+    for readers in (1, 2, 4, 8):
+        rate, lost, torn, flips = run(contacts, names, readers,
+                                      options.seconds)
+        failed = failed or lost or torn
+        print(f"{readers:>8}{rate:>12.0f}{lost:>6}{torn:>6}{flips:>15}")
+    if failed:
+        raise SystemExit("lost or torn lookups found")
+
+
+if __name__ == "__main__":
+    main()
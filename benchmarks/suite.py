@@ -0,0 +1,240 @@
+"""imports"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from app.file import read_file, write_file
+from benchmarks.synthetic import build_book
+
+
+# Calls of cheap operations per round, pages are slower and get PAGE_CALLS,
+# heavy operations are called once. Every measurement is repeated REPEATS
+# times and the fastest one is kept, as timeit does, so noise of a single
+# run is not reported as a regression by '--compare'.
+CALLS = 1000
+PAGE_CALLS = 10
+REPEATS = 5
+
+
+def consume(output):
+    """Reads streamed output, so generators are timed as a whole."""
+    if isinstance(output, str):
+        return output
+    return ''.join(output)
+
+
+def operations(contacts, generator: random.Random) -> list:
+    """Operations of AddressBook as (name, calls, function of call index).
+
+    Mutating operations work on their own 'Bench' contacts, so the
+    generated book is unchanged when they are done and the next round
+    starts from the same book.
+    """
+    names = list(contacts.data)
+    samples = [generator.choice(names) for _ in range(CALLS)]
+    phones = [contacts.data[name].phones[0] for name in samples]
+    fresh = [f"{number:010d}" for number in range(1, 3 * CALLS + 1)]
+
+    def new_name(index):
+        return f"Bench{index}"
+
+    return [
+        ("find", CALLS, lambda i: contacts.find(samples[i])),
+        ("find_by_phone", CALLS,
+         lambda i: contacts.find_by_phone(phones[i])),
+        ("show_birth_date", CALLS,
+         lambda i: contacts.show_birth_date(samples[i])),
+        ("search", CALLS,
+         lambda i: consume(contacts.search(samples[i][:6]))),
+        ("add_record", CALLS,
+         lambda i: contacts.add_record(new_name(i), fresh[i])),
+        ("add_phone", CALLS,
+         lambda i: contacts.add_phone(new_name(i), fresh[CALLS + i])),
+        ("change_phone", CALLS,
+         lambda i: contacts.change_phone(new_name(i), fresh[CALLS + i],
+                                         fresh[2 * CALLS + i])),
+        ("birthday_date", CALLS,
+         lambda i: contacts.birthday_date(new_name(i), "29.02.2000")),
+        ("delete", CALLS, lambda i: contacts.delete(new_name(i))),
+        ("show_all_page", PAGE_CALLS,
+         lambda i: consume(contacts.show_all(i + 1, 20))),
+        ("show_all", 1, lambda i: consume(contacts.show_all())),
+        ("birthdays_7", 1,
+         lambda i: consume(contacts.get_upcoming_birthdays(7))),
+        ("birthdays_30", 1,
+         lambda i: consume(contacts.get_upcoming_birthdays(30))),
+        ("birthdays_365", 1,
+         lambda i: consume(contacts.get_upcoming_birthdays(365))),
+        ("duplicates", 1, lambda i: consume(contacts.duplicates())),
+    ]
+
+
+def measure_memory(func) -> int:
+    """Peak memory allocated while a function runs, in bytes."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def timed(func, calls: int = 1) -> float:
+    """Seconds per call of 'calls' calls of a function of call index."""
+    start = time.perf_counter()
+    for index in range(calls):
+        func(index)
+    return (time.perf_counter() - start) / calls
+
+def result(timings: list, calls: int) -> dict:
+    """Result of repeated measurements: the fastest as 'seconds' and the
+    median, per call."""
+    return {"seconds": min(timings), "median": statistics.median(timings),
+            "calls": calls, "repeats": len(timings)}
+
+
+def run_size(count: int, seed: int, memory: bool) -> dict:
+    """Benchmarks one book size.
+
+    The operations run in REPEATS rounds, every round calls each operation
+    'calls' times in a row and the fastest round is kept.
+
+    Args:
+        count (int): Number of contacts.
+        seed (int): Seed of the generator.
+        memory (bool): Whether to measure peak memory with tracemalloc.
+
+    Returns:
+        dict: Operation name to its result: 'seconds' per call of the
+            fastest round, 'median', 'calls', 'repeats', and 'peak_bytes'
+            where memory was measured.
+    """
+    books = []
+    builds = [timed(lambda _: books.append(build_book(count, seed)))
+              for _ in range(REPEATS)]
+    contacts = books[-1]
+    del books[:-1]
+    results = {"build": result(builds, 1)}
+
+    generator = random.Random(seed)
+    measured = operations(contacts, generator)
+    rounds = {name: [] for name, _, _ in measured}
+    for _ in range(REPEATS):
+        for name, calls, call in measured:
+            rounds[name].append(timed(call, min(calls, count)))
+    for name, calls, _ in measured:
+        results[name] = result(rounds[name], min(calls, count))
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = Path(directory) / "contacts.pkl"
+        writes = [timed(lambda _: write_file(database, contacts))
+                  for _ in range(REPEATS)]
+        results["write_file"] = result(writes, 1)
+        results["write_file"]["file_bytes"] = database.stat().st_size
+        reads = [timed(lambda _: read_file(database))
+                 for _ in range(REPEATS)]
+        results["read_file"] = result(reads, 1)
+        contacts = read_file(database)
+        if memory:
+            results["write_file"]["peak_bytes"] = measure_memory(
+                lambda: write_file(database, contacts)
+            )
+            results["read_file"]["peak_bytes"] = measure_memory(
+                lambda: read_file(database)
+            )
+    return results
+
+
+def compare(old_path: str, new_path: str, tolerance: float) -> int:
+    """Prints changes between two runs and flags regressions.
+
+    Args:
+        old_path (str): JSON results of the baseline run.
+        new_path (str): JSON results of the new run.
+        tolerance (float): Allowed slowdown or memory growth, e.g. 0.1.
+
+    Returns:
+        int: Number of regressions.
+    """
+    with open(old_path, encoding='utf-8') as file:
+        old = json.load(file)["results"]
+    with open(new_path, encoding='utf-8') as file:
+        new = json.load(file)["results"]
+    regressions = 0
+    print(f"{'size':>8} {'operation':<16}{'metric':<12}"
+          f"{'old':>14}{'new':>14}{'change':>9}")
+    for size in new:
+        for operation, result in new[size].items():
+            baseline = old.get(size, {}).get(operation)
+            if baseline is None:
+                continue
+            for metric in ("seconds", "peak_bytes"):
+                if metric not in result or not baseline.get(metric):
+                    continue
+                change = result[metric] / baseline[metric] - 1
+                flag = ""
+                if change > tolerance:
+                    flag = "  REGRESSION"
+                    regressions += 1
+                print(f"{size:>8} {operation:<16}{metric:<12}"
+                      f"{baseline[metric]:>14.6g}{result[metric]:>14.6g}"
+                      f"{change:>+9.1%}{flag}")
+    return regressions
+
+
+def main():
+    """Times every AddressBook operation and the pickle round-trip on
+    generated books of several sizes and writes the results as JSON, or
+    compares two such results."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[1_000, 10_000, 100_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON file, stdout if not given")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip tracemalloc peaks, they double the time")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="compare two JSON results instead of running")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown before a regression is "
+                        "flagged, 0.2 is 20%%")
+    options = parser.parse_args()
+
+    if options.compare:
+        regressions = compare(*options.compare, options.tolerance)
+        print(f"{regressions} regressions", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": options.seed,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": {},
+    }
+    for count in options.sizes:
+        results = run_size(count, options.seed, not options.no_memory)
+        report["results"][str(count)] = results
+        for operation, result in results.items():
+            print(f"{count:>8} {operation:<16}"
+                  f"{result['seconds'] * 1e6:>14.1f} us"
+                  f"{result.get('peak_bytes', 0) / 2**20:>10.1f} MiB",
+                  file=sys.stderr)
+
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""imports"""
+import random
+from datetime import date, timedelta
+from app.book import AddressBook
+from app.ingest import batches
+from app.record import Birthday, normalize_phone
+
+
+FIRST_NAMES = ("Olena", "Andrii", "Iryna", "Taras", "Oksana", "Dmytro",
+               "Natalia", "Serhii", "Yulia", "Oleh", "Mariia", "Bohdan")
+LAST_NAMES = ("Kovalenko", "Bondarenko", "Tkachenko", "Shevchenko",
+              "Kravchenko", "Melnyk", "Boiko", "Moroz", "Lysenko", "Savchuk")
+OPERATORS = ("050", "063", "066", "067", "068", "073", "093", "095", "097")
+FIRST_BIRTHDAY = date(1940, 1, 1)
+
+
+def generate_contacts(count: int, seed: int = 0, birthday_share: float = 0.7,
+                      max_phones: int = 3, unique_phones: bool = False):
+    """Generates deterministic contacts for benchmarks.
+
+    Names are unique, every contact has 1 to 'max_phones' phones of
+    Ukrainian operators, and 'birthday_share' of contacts have a birthday.
+
+    Args:
+        count (int): Number of contacts.
+        seed (int, optional): Seed of the generator. Defaults to 0.
+        birthday_share (float, optional): Share of contacts with birthdays.
+        max_phones (int, optional): Maximal number of phones of a contact.
+        unique_phones (bool, optional): Whether the first phone of contact
+            number N is N written with 10 digits, so no other contact has
+            it, e.g. for lookups by phone.
+
+    Yields:
+        tuple: Name, list of phones and birthday date or None.
+    """
+    generator = random.Random(seed)
+    for number in range(count):
+        contact_name = f"{generator.choice(FIRST_NAMES)}" \
+            f"{generator.choice(LAST_NAMES)}{number}"
+        phones = [
+            f"{generator.choice(OPERATORS)}{generator.randrange(10**7):07d}"
+            for _ in range(generator.randint(1, max_phones))
+        ]
+        if unique_phones:
+            phones[0] = f"{number:010d}"
+        birth_date = None
+        if generator.random() < birthday_share:
+            birth_date = FIRST_BIRTHDAY + timedelta(
+                days=generator.randrange(365 * 65)
+            )
+        yield contact_name, phones, birth_date
+
+
+def build_book(count: int, seed: int = 0, **options) -> AddressBook:
+    """Builds a book of generated contacts with the bulk 'merge_batch'
+    path of 'import', in batches of its size.
+
+    Args:
+        count (int): Number of contacts.
+        seed (int, optional): Seed of the generator. Defaults to 0.
+        options: Keyword arguments of 'generate_contacts'.
+
+    Returns:
+        AddressBook: The book.
+    """
+    contacts = AddressBook()
+    for batch in batches(generate_contacts(count, seed, **options)):
+        contacts.merge_batch([
+            (contact_name, [normalize_phone(phone) for phone in phones],
+             Birthday.from_ordinal(birth_date.toordinal())
+             if birth_date else None)
+            for contact_name, phones, birth_date in batch
+        ])
+    return contacts
@@ -1,8 +1,36 @@
 """imports"""
+import argparse
 import re
+import signal
+import sys
+import time
 from pathlib import Path
-from app.file import read_file, write_file
-from app.color import check_txt, color, command_help
+from app.file import (COMPRESSIONS, SnapshotError, read_file,
+                      set_snapshot_options, write_file)
+from app.autosave import Autosaver
+from app.journal import Journal
+from app.store import read_store, write_store
+from app.sqlite_book import read_sqlite, write_sqlite
+from app.ingest import set_workers
+from app.color import (COLOR_MODES, NO_COLOR_ENV, check_txt,
+                       disable_colors, set_color_mode)
+from app.stats import STATS, STATS_ENV
+from app.commands import COMMANDS, dispatch
+
+
+NOT_LETTERS = re.compile("[^A-Za-z]")
+
+STORAGES = {
+    "pickle": (Path("app/contacts.pkl"), read_file, write_file),
+    "mmap": (Path("app/contacts.abk"), read_store, write_store),
+    "sqlite": (Path("app/contacts.db"), read_sqlite, write_sqlite),
+}
+
+ERRORS = (
+    "invalid", "Invalid", "phone not in contacts", "contact exists",
+    "no name for search", "Date doesn't exist", "Contact not found",
+    "File not found"
+)
 
 
 def parse_input(user_input: str) -> tuple:
@@ -15,10 +43,141 @@ def parse_input(user_input: str) -> tuple:
         tuple: A tuple containing the command and its arguments.
     """
     cmd, *args = user_input.split()
-    cmd = cmd.strip().lower()
-    cmd = re.sub("[^A-Za-z]", "", cmd)
+    cmd = cmd.lower()
+    if not cmd.isalpha():
+        cmd = NOT_LETTERS.sub("", cmd)
     return cmd, *args
 
+def build_parser() -> argparse.ArgumentParser:
+    """Create parser for command line options of the bot.
+
+    Returns:
+        argparse.ArgumentParser: Parser of command line options.
+    """
+    parser = argparse.ArgumentParser(description="Assistant bot")
+    parser.add_argument("--journal", action="store_true",
+                        help="append every change to a journal instead of "
+                        "saving the whole book only on exit")
+    parser.add_argument("--storage", choices=STORAGES, default="pickle",
+                        help="format of the contacts file")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run commands from FILE ('-' for stdin) "
+                        "without prompts and colors")
+    parser.add_argument("--quiet", action="store_true",
+                        help="do not print results of batch commands")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes validating rows of 'import'")
+    parser.add_argument("--compress", choices=COMPRESSIONS, default="none",
+                        help="compression of pickle snapshots")
+    parser.add_argument("--backups", type=int, default=3,
+                        help="number of previous pickle snapshots to keep")
+    parser.add_argument("--autosave", type=float, default=30,
+                        metavar="SECONDS",
+                        help="save changes in the background every SECONDS, "
+                        "0 to save only on exit")
+    parser.add_argument("--autosave-changes", type=int, default=100,
+                        metavar="N",
+                        help="save in the background after N changes")
+    parser.add_argument("--stats", metavar="FILE",
+                        help="collect command latencies, show them with "
+                        "'stats' and write them to FILE on exit "
+                        f"(or set {STATS_ENV}=FILE)")
+    parser.add_argument("--profile-command", metavar="COMMAND",
+                        help="run COMMAND under cProfile, the profile is "
+                        "written next to the --stats file, which is "
+                        "required")
+    parser.add_argument("--shards", type=int, default=1, metavar="N",
+                        help="split the book by name into N files, e.g. "
+                        "contacts.0.pkl, each loaded and saved on its own")
+    parser.add_argument("--color", choices=COLOR_MODES, default="auto",
+                        help="color output: 'auto' colors a terminal "
+                        f"unless {NO_COLOR_ENV} is set")
+    parser.add_argument("--serve", metavar="ADDRESS",
+                        help="serve the book over a line protocol on "
+                        "'host:port' or 'unix:path'")
+    return parser
+
+def terminate(signum, _frame) -> None:
+    """Turn SIGTERM into SystemExit, so the book is saved on the way out."""
+    sys.exit(128 + signum)
+
+def write_output(output, stream=sys.stdout) -> None:
+    """Write output of a command, streaming it if it is not a string.
+
+    Args:
+        output (str | Iterable[str]): Output of the command.
+        stream (TextIO, optional): Where to write. Defaults to stdout.
+    """
+    if isinstance(output, str):
+        stream.write(f"{output}\n")
+    else:
+        stream.writelines(output)
+
+def run_batch(contacts, source, quiet: bool = False) -> tuple:
+    """Run commands read line by line from a file or a pipe.
+
+    Empty lines and lines starting with '#' are skipped. A failing command
+    is counted as an error and does not stop the run.
+
+    Args:
+        contacts (AddressBook): The address book.
+        source (TextIO): Lines with commands.
+        quiet (bool, optional): Do not write results of commands.
+
+    Returns:
+        tuple: Number of processed commands and number of errors.
+    """
+    processed = errors = 0
+    for line in source:
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        with STATS.stage("parse"):
+            command, *args = parse_input(line)
+        if command in COMMANDS and COMMANDS[command].stop:
+            break
+        processed += 1
+        try:
+            output = dispatch(contacts, command, args)
+            if isinstance(output, str) and output.startswith(ERRORS):
+                errors += 1
+            if not quiet:
+                # Streamed output runs the command, so it can fail too.
+                with STATS.stage("output"):
+                    write_output(output)
+        except Exception as error:
+            errors += 1
+            if not quiet:
+                write_output(f"Invalid command '{line.strip()}': {error!r}")
+    return processed, errors
+
+def batch(options, database, reader, writer) -> None:
+    """Run the bot in batch mode and print a summary to stderr.
+
+    The book is saved once, after all commands are done, and also if the
+    run is interrupted.
+    """
+    disable_colors()
+    contacts = reader(database)
+    start = time.perf_counter()
+    processed = errors = 0
+    try:
+        if options.batch == "-":
+            processed, errors = run_batch(contacts, sys.stdin, options.quiet)
+        else:
+            with open(options.batch, 'r', encoding='utf-8') as source:
+                processed, errors = run_batch(contacts, source,
+                                              options.quiet)
+    finally:
+        elapsed = time.perf_counter() - start
+        with STATS.stage("persist"):
+            writer(database, contacts)
+    saved = time.perf_counter() - start - elapsed
+    print(f"commands: {processed}, errors: {errors}, "
+          f"time: {elapsed:.3f}s "
+          f"({processed / elapsed if elapsed else 0:.0f} commands/s), "
+          f"save: {saved:.3f}s", file=sys.stderr)
+
+
 def main():
     """This code is designed to create a simple command-line interface (CLI)
     application that interacts with a contacts database. The user can perform
@@ -26,43 +185,94 @@ def main():
     uses the 'colorama' module to add colors to the output strings for better
     readability.
     """
-    database = Path("app/contacts.pkl")
-    contacts = read_file(database)
+    parser = build_parser()
+    options = parser.parse_args()
+    if options.profile_command and not (options.stats or STATS.path):
+        parser.error(f"--profile-command needs --stats FILE or {STATS_ENV}, "
+                     "the profile is written next to it")
+    if options.profile_command:
+        # Written like the command in the bot, e.g. 'add-birthday' or the
+        # alias 'exit', and profiled under the registered name.
+        command = NOT_LETTERS.sub("", options.profile_command.lower())
+        if command not in COMMANDS:
+            parser.error(f"--profile-command: unknown command "
+                         f"'{options.profile_command}'")
+        options.profile_command = COMMANDS[command].name
+    if options.stats or options.profile_command:
+        STATS.enable(options.stats or STATS.path, options.profile_command)
+    set_color_mode(options.color)
+    set_workers(options.workers)
+    set_snapshot_options(options.compress, options.backups)
+    database, reader, writer = STORAGES[options.storage]
+    if options.shards > 1:
+        # Thread pools of shards are imported only by sharded runs.
+        from app.shards import sharded_storage
+        reader, writer = sharded_storage(options.shards, reader, writer)
+    # Every mode saves the book on SIGTERM, the server and batches too.
+    signal.signal(signal.SIGTERM, terminate)
+    if options.batch:
+        batch(options, database, reader, writer)
+        return
+    if options.serve:
+        # asyncio is imported only by the server.
+        from app.server import serve
+        serve(reader(database), parse_input, options.serve, database, writer)
+        return
+    journal = Journal(database, reader, writer) if options.journal else None
+    contacts = journal.load() if journal else reader(database)
+    if journal:
+        autosavers = []
+    elif options.shards > 1:
+        autosavers = contacts.autosavers(options.autosave,
+                                         options.autosave_changes)
+    else:
+        autosavers = [Autosaver(contacts, database, writer, options.autosave,
+                                options.autosave_changes)]
 
     print(check_txt('greeting'))
 
-    while True:
-        user_input = input(check_txt('placeholder'))
-        command, *args = parse_input(user_input)
+    farewell = None
+    try:
+        for autosaver in autosavers:
+            autosaver.start()
+        while True:
+            try:
+                user_input = input(check_txt('placeholder'))
+            except EOFError:
+                break
+            with STATS.stage("parse"):
+                command, *args = parse_input(user_input)
 
-        match command:
-            case "close" | "exit":
-                write_file(database, contacts)
-                print(check_txt('bye'))
+            if command in COMMANDS and COMMANDS[command].stop:
+                farewell = dispatch(contacts, command, args)
                 break
-            case "hello":
-                print(check_txt('hello'))
-            case "help":
-                print(command_help())
-            case "add":
-                print(color(contacts.add_record(args), 'yellow'), '\n')
-            case "addbirthday":
-                print(color(contacts.birthday_date(args), 'yellow'), '\n')
-            case "change":
-                print(color(contacts.change_phone(*args), 'yellow'), '\n')
-            case "del":
-                print(color(contacts.delete(args), 'yellow'), '\n')
-            case "phone":
-                print(contacts.find(args))
-            case "all":
-                print(contacts.show_all())
-            case "showbirthday":
-                print(color(contacts.show_birth_date(args), 'green'), '\n')
-            case "birthdays":
-                print(contacts.get_upcoming_birthdays(), '\n')
-            case _:
-                print(check_txt("invalid command"))
+
+            output = dispatch(contacts, command, args)
+            with STATS.stage("output"):
+                write_output(output)
+                print()
+
+            with STATS.stage("persist"):
+                if journal:
+                    journal.append(contacts, command, args)
+                for autosaver in autosavers:
+                    autosaver.notify()
+    except KeyboardInterrupt:
+        print()
+    finally:
+        with STATS.stage("persist"):
+            if journal:
+                journal.close(contacts)
+            for autosaver in autosavers:
+                autosaver.close()
+    if farewell:
+        print(farewell)
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    except SnapshotError as error:
+        sys.exit(str(error))
+    finally:
+        STATS.save()